@@ -0,0 +1,279 @@
+"""
+逆質量検索モジュール（質量分解）
+
+観測された質量から、その質量になりうるアミノ酸組成（必要なら修飾込み）を
+ppm 許容誤差内で列挙する。
+
+残基質量を整数化（resolution Da 単位）した動的計画法の表を前計算しておき、
+組成を列挙する際に「残りの質量をまだ作れるか」を表引きで判定して
+枝刈りする。表は DecompositionTable として作成し、複数のクエリで使い回す。
+"""
+
+import math
+
+import numpy as np
+
+from peptide_mw import MONOISOTOPIC_MASS, WATER_MONOISOTOPIC, MODIFICATIONS, PROTON_MASS
+
+# 修飾が付きうる残基 (None は N末端など残基を問わないもの)
+MODIFICATION_SITES = {
+    "phosphorylation": "STY",
+    "acetylation": None,
+    "methylation": "KR",
+    "dimethylation": "KR",
+    "trimethylation": "K",
+    "oxidation": "M",
+    "deamidation": "NQ",
+    "carbamidomethylation": "C",
+    "ubiquitination": "K",
+}
+
+
+def neutral_mass_from_mz(mz, charge):
+    """
+    m/z と荷電状態から中性質量を求める (calculate_mz の逆変換)。
+
+    Parameters
+    ----------
+    mz : float
+        m/z 値
+    charge : int
+        荷電状態 (z)
+
+    Returns
+    -------
+    float
+        中性のモノアイソトピック質量 (Da)
+    """
+    if charge == 0:
+        raise ValueError("荷電状態は0以外を指定してください")
+    return mz * abs(charge) - charge * PROTON_MASS
+
+
+class DecompositionTable:
+    """
+    質量分解用の前計算テーブル。
+
+    I と L は同じ質量なので "L" にまとめて扱う。
+
+    Parameters
+    ----------
+    max_mass : float
+        分解できる最大質量 (Da)
+    resolution : float
+        整数化の単位 (Da)。小さいほど枝刈りが効くがテーブルが大きくなる
+        (19 x max_mass / resolution バイト。既定値で約57MB)。
+    modifications : dict, optional
+        {修飾名: 最大個数}。修飾名は MODIFICATIONS のキー。
+    """
+
+    def __init__(self, max_mass=3000.0, resolution=0.001, modifications=None):
+        residues = {}
+        for aa, mass in MONOISOTOPIC_MASS.items():
+            if aa == "I":
+                continue
+            residues[aa] = mass
+        # 重い残基から順に列挙するため質量の昇順に並べる
+        self.residues = sorted(residues, key=residues.get)
+        self.masses = np.array([residues[aa] for aa in self.residues])
+        self.resolution = resolution
+        self.max_mass = max_mass
+
+        self.modifications = {}
+        for name, max_count in (modifications or {}).items():
+            if name not in MODIFICATIONS:
+                raise ValueError(f"不明な修飾タイプ: {name}")
+            self.modifications[name] = int(max_count)
+
+        self.int_masses = np.rint(self.masses / resolution).astype(np.int64)
+        # 整数化による1残基あたりの最大誤差 (Da)
+        self.max_rounding = float(np.abs(self.int_masses * resolution - self.masses).max())
+
+        size = int(math.ceil(max_mass / resolution)) + 1
+        # 区間内の判定を bytes.find で行うため、行ごとに bytes で持つ
+        self._reachable = [row.tobytes() for row in self._build(size)]
+
+    def _build(self, size):
+        """
+        reachable[i][x]: 残基 0..i で整数質量 x を作れるか、の表を作る。
+
+        x を残基 i の整数質量 w で割った余りごとに並べ替えると、
+        「x - w が作れれば x も作れる」は列方向の累積ORになる。
+        """
+        reachable = np.zeros((len(self.residues), size), dtype=bool)
+        previous = np.zeros(size, dtype=bool)
+        previous[0] = True
+        for i, w in enumerate(self.int_masses):
+            rows = -(-size // w)
+            padded = np.zeros(rows * w, dtype=bool)
+            padded[:size] = previous
+            np.logical_or.accumulate(padded.reshape(rows, w), axis=0, out=padded.reshape(rows, w))
+            reachable[i] = padded[:size]
+            previous = reachable[i]
+        return reachable
+
+    def _any_reachable(self, i, lo, hi):
+        """残基 0..i で整数質量 [lo, hi] のどれかを作れるか"""
+        if hi < 0:
+            return False
+        lo = max(lo, 0)
+        if i < 0:
+            return lo == 0
+        return self._reachable[i].find(b"\x01", lo, hi + 1) >= 0
+
+    def _modification_combinations(self):
+        """(修飾の個数の辞書, 質量変化の合計) を列挙する"""
+        combos = [({}, 0.0)]
+        for name, max_count in self.modifications.items():
+            delta = MODIFICATIONS[name]
+            combos = [
+                ({**mods, name: c} if c else mods, total + c * delta)
+                for mods, total in combos
+                for c in range(max_count + 1)
+            ]
+        return combos
+
+    def decompose(self, mass, ppm=10.0, min_length=1, max_length=None, limit=None):
+        """
+        中性質量に一致するアミノ酸組成を列挙する。
+
+        Parameters
+        ----------
+        mass : float
+            観測された中性のモノアイソトピック質量 (Da)。水分子を含むペプチド全体の質量。
+        ppm : float
+            許容誤差 (ppm)
+        min_length, max_length : int, optional
+            残基数の下限・上限
+        limit : int, optional
+            返す組成の最大数。この件数が見つかった時点で列挙を打ち切る。
+
+        Returns
+        -------
+        list of dict
+            各組成について {"composition", "modifications", "length", "mass", "error_ppm"}。
+            誤差の絶対値が小さい順。
+        """
+        tolerance = mass * ppm * 1e-6
+        if mass - WATER_MONOISOTOPIC + tolerance > self.max_mass:
+            raise ValueError(f"質量がテーブルの上限を超えています: {mass} (max_mass={self.max_mass})")
+
+        if max_length is None:
+            max_length = int((mass + tolerance) / self.masses.min())
+
+        results = []
+        for mods, delta in self._modification_combinations():
+            if limit is not None and len(results) >= limit:
+                break
+            residue_mass = mass - WATER_MONOISOTOPIC - delta
+            if residue_mass + tolerance < 0:
+                continue
+            for counts in self._enumerate(residue_mass - tolerance, residue_mass + tolerance,
+                                          min_length, max_length):
+                composition = {aa: c for aa, c in zip(self.residues, counts) if c}
+                if not self._sites_available(mods, composition):
+                    continue
+                total = float(np.dot(counts, self.masses)) + WATER_MONOISOTOPIC + delta
+                results.append({
+                    "composition": dict(sorted(composition.items())),
+                    "modifications": mods,
+                    "length": int(sum(counts)),
+                    "mass": round(total, 5),
+                    "error_ppm": round((total - mass) / mass * 1e6, 3),
+                })
+                if limit is not None and len(results) >= limit:
+                    break
+
+        results.sort(key=lambda r: abs(r["error_ppm"]))
+        return results[:limit] if limit is not None else results
+
+    def decompose_batch(self, masses, ppm=10.0, min_length=1, max_length=None, limit=None):
+        """
+        複数の質量をまとめて分解する (テーブルは共通)。
+
+        Returns
+        -------
+        list of list of dict
+            masses と同じ順の decompose() の結果
+        """
+        return [
+            self.decompose(m, ppm=ppm, min_length=min_length, max_length=max_length, limit=limit)
+            for m in masses
+        ]
+
+    @staticmethod
+    def _sites_available(mods, composition):
+        for name, c in mods.items():
+            sites = MODIFICATION_SITES.get(name)
+            if sites is None:
+                continue
+            available = sum(composition.get("L" if aa == "I" else aa, 0) for aa in sites)
+            if available < c:
+                return False
+        return True
+
+    def _enumerate(self, lo_mass, hi_mass, min_length, max_length):
+        """
+        残基質量の合計が [lo_mass, hi_mass] に入る組成 (各残基の個数) を列挙する。
+
+        重い残基から個数を決めていき、残りの質量を軽い残基で作れない枝は
+        テーブルで打ち切る。整数化の誤差は、残りに置ける残基数 *
+        max_rounding の分だけ窓を広げて吸収し、最後に実際の質量で判定する。
+        """
+        masses = self.masses.tolist()
+        res = self.resolution
+        err = self.max_rounding
+        n = len(masses)
+        counts = [0] * n
+        lightest = masses[0]
+
+        def recurse(i, lo, hi, length):
+            # lo, hi: 残り (残基 0..i) で作るべき質量 (Da)
+            if i < 0:
+                if lo <= 0.0 <= hi and min_length <= length:
+                    yield list(counts)
+                return
+            m = masses[i]
+            max_c = min(int(hi / m + 1e-9), max_length - length)
+            for c in range(max_c, -1, -1):
+                r_lo = lo - c * m
+                r_hi = hi - c * m
+                if r_hi < 0:
+                    continue
+                # 残り 0..i-1 に置ける残基数の範囲で長さ制約を判定する
+                used = length + c
+                most = min(max_length - used, int(r_hi / lightest + 1e-9))
+                if used + most < min_length:
+                    continue
+                if i == 0 or most == 0:
+                    if not r_lo <= 0.0 <= r_hi:
+                        continue
+                elif used + math.ceil(r_lo / masses[i - 1] - 1e-9) > max_length:
+                    # c を減らすと必要な残基数は増える一方なので打ち切り
+                    break
+                # 整数化誤差は残りの残基数 * max_rounding 以内
+                slack = most * err
+                int_lo = int(math.floor((r_lo - slack) / res))
+                int_hi = int(math.ceil((r_hi + slack) / res))
+                if not self._any_reachable(i - 1, int_lo, int_hi):
+                    continue
+                counts[i] = c
+                yield from recurse(i - 1, r_lo, r_hi, length + c)
+            counts[i] = 0
+
+        yield from recurse(n - 1, lo_mass, hi_mass, 0)
+
+
+if __name__ == "__main__":
+    from peptide_mw import calculate_mw
+
+    table = DecompositionTable(modifications={"oxidation": 1, "phosphorylation": 1})
+    for seq in ["SIINFEKL", "GILGFVFTL"]:
+        mass = calculate_mw(seq)
+        hits = table.decompose(mass, ppm=5, min_length=len(seq), max_length=len(seq))
+        print(f"{seq} ({mass:.5f} Da): 候補 {len(hits)} 件")
+        for hit in hits[:5]:
+            mods = ", ".join(f"{k}x{v}" for k, v in hit["modifications"].items())
+            comp = "".join(f"{aa}{c}" for aa, c in hit["composition"].items())
+            print(f"  {comp} {mods} ({hit['error_ppm']:+.2f} ppm)")
+        print()
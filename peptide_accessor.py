@@ -0,0 +1,188 @@
+"""
+pandas 用ペプチドアクセサ
+
+このモジュールを import すると、文字列の Series に .peptide アクセサが追加される。
+
+    import peptide_accessor  # noqa: F401
+
+    df["mw"] = df["seq"].peptide.mw()
+    df["mz2"] = df["seq"].peptide.mz(charge=2)
+    comp = df["seq"].peptide.composition()
+
+Arrow ベースの文字列列 (pandas の "string[pyarrow]" / ArrowDtype や、
+pandas 3 の既定の str 型) では、Arrow のオフセット・データバッファを
+numpy 配列として直接読むため、行ごとの Python 文字列は作らない。
+それ以外の列 (object 型など) は文字列のリストを経由して計算する。
+"""
+
+import numpy as np
+import pandas as pd
+
+from peptide_properties import (
+    AMINO_ACIDS,
+    encode_buffer,
+    encode_sequences,
+    composition_matrix,
+    molecular_weight,
+    properties_from_codes,
+)
+from peptide_mw import PROTON_MASS
+
+
+def _arrow_chunks(series):
+    """Arrow ベースの文字列列なら pyarrow の ChunkedArray を返す (それ以外は None)"""
+    array = series.array
+    if not hasattr(array, "__arrow_array__"):
+        return None
+    if not (isinstance(series.dtype, pd.ArrowDtype)
+            or (isinstance(series.dtype, pd.StringDtype) and series.dtype.storage == "pyarrow")):
+        return None
+    import pyarrow as pa
+
+    chunked = array.__arrow_array__()
+    if isinstance(chunked, pa.Array):
+        chunked = pa.chunked_array([chunked])
+    if not (pa.types.is_string(chunked.type) or pa.types.is_large_string(chunked.type)):
+        if pa.types.is_string_view(chunked.type):
+            chunked = chunked.cast(pa.large_string())
+        else:
+            return None
+    return chunked
+
+
+def _chunk_buffers(chunk):
+    """文字列の Arrow 配列から (データ, オフセット) の numpy ビューを取り出す (コピーしない)"""
+    import pyarrow as pa
+
+    _, offsets_buf, data_buf = chunk.buffers()
+    offset_type = np.int64 if pa.types.is_large_string(chunk.type) else np.int32
+    offsets = np.frombuffer(offsets_buf, dtype=offset_type,
+                            count=len(chunk) + 1, offset=chunk.offset * np.dtype(offset_type).itemsize)
+    if data_buf is None:
+        data = np.zeros(0, dtype=np.uint8)
+    else:
+        data = np.frombuffer(data_buf, dtype=np.uint8)
+    return data, offsets
+
+
+def _encode_series(series):
+    """
+    Series を (codes, rows, lengths, 欠損マスク) にする。
+
+    Arrow の列はチャンクごとに encode_buffer し、行番号をずらして連結する。
+    """
+    chunked = _arrow_chunks(series)
+    if chunked is None:
+        missing = series.isna().to_numpy()
+        values = series.where(~missing, "").astype(str).tolist()
+        codes, rows, lengths = encode_sequences(values)
+        return codes, rows, lengths, missing
+
+    code_parts, row_parts, length_parts, missing_parts = [], [], [], []
+    row_offset = 0
+    for chunk in chunked.chunks:
+        data, offsets = _chunk_buffers(chunk)
+        codes, rows, lengths = encode_buffer(data, offsets)
+        code_parts.append(codes)
+        row_parts.append(rows + row_offset)
+        length_parts.append(lengths)
+        missing_parts.append(chunk.is_null().to_numpy(zero_copy_only=False))
+        row_offset += len(chunk)
+
+    if not code_parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty.astype(np.uint8), empty, empty, np.zeros(0, dtype=bool)
+    return (np.concatenate(code_parts), np.concatenate(row_parts),
+            np.concatenate(length_parts), np.concatenate(missing_parts))
+
+
+@pd.api.extensions.register_series_accessor("peptide")
+class PeptideAccessor:
+    """ペプチド配列の Series 用アクセサ (series.peptide.xxx)"""
+
+    def __init__(self, series):
+        self._series = series
+        self._encoded = None
+
+    def _encode(self):
+        if self._encoded is None:
+            self._encoded = _encode_series(self._series)
+        return self._encoded
+
+    def _to_series(self, values, missing, name):
+        values = np.asarray(values, dtype=np.float64)
+        if missing.any():
+            values = values.copy()
+            values[missing] = np.nan
+        return pd.Series(values, index=self._series.index, name=name)
+
+    def mw(self, mass_type="monoisotopic"):
+        """
+        分子量 (calculate_mw の修飾なし版)。
+
+        Parameters
+        ----------
+        mass_type : str
+            "monoisotopic" または "average"
+
+        Returns
+        -------
+        pandas.Series of float64
+            分子量 (Da)。欠損値は NaN。
+        """
+        codes, rows, lengths, missing = self._encode()
+        counts = composition_matrix(codes, rows, len(lengths))
+        return self._to_series(molecular_weight(counts, mass_type), missing, "molecular_weight")
+
+    def mz(self, charge, mass_type="monoisotopic"):
+        """
+        m/z 値 (calculate_mz の修飾なし版)。
+
+        Parameters
+        ----------
+        charge : int
+            荷電状態 (z)
+        mass_type : str
+            "monoisotopic" または "average"
+
+        Returns
+        -------
+        pandas.Series of float64
+            m/z 値。欠損値は NaN。
+        """
+        if charge == 0:
+            raise ValueError("荷電状態は0以外を指定してください")
+        mw = self.mw(mass_type)
+        return ((mw + charge * PROTON_MASS) / abs(charge)).rename(f"mz_{charge}")
+
+    def composition(self):
+        """
+        アミノ酸組成 (amino_acid_composition の一括版)。
+
+        Returns
+        -------
+        pandas.DataFrame of int64
+            列は AMINO_ACIDS の各アミノ酸。欠損値の行はすべて0。
+        """
+        codes, rows, lengths, _ = self._encode()
+        counts = composition_matrix(codes, rows, len(lengths))
+        return pd.DataFrame(counts, index=self._series.index, columns=list(AMINO_ACIDS))
+
+    def properties(self, pH=7.0, pka_scale="EMBOSS",
+                   hydropathy_scale="kyte_doolittle", mass_type="monoisotopic"):
+        """
+        物性の一括計算 (peptide_properties と同じ列)。
+
+        Returns
+        -------
+        pandas.DataFrame
+            欠損値の行は NaN (length は 0)。
+        """
+        codes, rows, lengths, missing = self._encode()
+        props = properties_from_codes(codes, rows, lengths, pH, pka_scale,
+                                      hydropathy_scale, mass_type)
+        columns = {
+            name: (values if name == "length" else self._to_series(values, missing, name).to_numpy())
+            for name, values in props.items()
+        }
+        return pd.DataFrame(columns, index=self._series.index)
@@ -57,6 +57,9 @@ AVERAGE_MASS = {
 WATER_MONOISOTOPIC = 18.01056
 WATER_AVERAGE = 18.0153
 
+# プロトンの質量 (m/z 計算用)
+PROTON_MASS = 1.00728
+
 # 一般的な修飾の質量変化
 MODIFICATIONS = {
     "phosphorylation": 79.96633,       # リン酸化 (S, T, Y)
@@ -152,9 +155,8 @@ def calculate_mz(sequence, charge, mass_type="monoisotopic", modifications=None)
     if charge == 0:
         raise ValueError("荷電状態は0以外を指定してください")
 
-    proton_mass = 1.00728
     mw = calculate_mw(sequence, mass_type, modifications)
-    return (mw + charge * proton_mass) / abs(charge)
+    return (mw + charge * PROTON_MASS) / abs(charge)
 
 
 def amino_acid_composition(sequence):
@@ -0,0 +1,492 @@
+"""
+ペプチド物性計算モジュール（ベクトル化版）
+
+多数のペプチド配列について、アミノ酸組成の行列を一括で作り、
+そこから等電点・正味電荷・GRAVY・脂肪族指数・不安定性指数を
+numpy の配列演算でまとめて計算する。
+
+ネオアンチゲン候補（10^6 本規模）のフィルタリングを想定しており、
+ペプチドごとの Python ループは使わない。
+"""
+
+import numpy as np
+
+from peptide_mw import (
+    MONOISOTOPIC_MASS,
+    AVERAGE_MASS,
+    WATER_MONOISOTOPIC,
+    WATER_AVERAGE,
+)
+
+# 組成行列の列の並び
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+# pKa スケール
+# Nterm / Cterm は末端、それ以外は側鎖の pKa
+PKA_SCALES = {
+    "EMBOSS": {
+        "Nterm": 8.6, "Cterm": 3.6,
+        "C": 8.5, "D": 3.9, "E": 4.1, "H": 6.5, "K": 10.8, "R": 12.5, "Y": 10.1,
+    },
+    "Lehninger": {
+        "Nterm": 9.69, "Cterm": 2.34,
+        "C": 8.33, "D": 3.86, "E": 4.25, "H": 6.0, "K": 10.5, "R": 12.4, "Y": 10.0,
+    },
+    "Solomon": {
+        "Nterm": 9.6, "Cterm": 2.4,
+        "C": 8.3, "D": 3.9, "E": 4.3, "H": 6.0, "K": 10.5, "R": 12.5, "Y": 10.1,
+    },
+    "Sillero": {
+        "Nterm": 8.2, "Cterm": 3.2,
+        "C": 9.0, "D": 4.0, "E": 4.5, "H": 6.4, "K": 10.4, "R": 12.0, "Y": 10.0,
+    },
+    # Bjellqvist の基本値（末端残基の種類による補正は行わない）
+    "Bjellqvist": {
+        "Nterm": 7.5, "Cterm": 3.55,
+        "C": 9.0, "D": 4.05, "E": 4.45, "H": 5.98, "K": 10.0, "R": 12.0, "Y": 10.0,
+    },
+}
+
+# 正電荷・負電荷を持つ側鎖
+POSITIVE_RESIDUES = ("K", "R", "H")
+NEGATIVE_RESIDUES = ("D", "E", "C", "Y")
+
+# 疎水性スケール
+HYDROPATHY_SCALES = {
+    # Kyte & Doolittle (1982) - GRAVY の標準スケール
+    "kyte_doolittle": {
+        "A": 1.8, "R": -4.5, "N": -3.5, "D": -3.5, "C": 2.5,
+        "Q": -3.5, "E": -3.5, "G": -0.4, "H": -3.2, "I": 4.5,
+        "L": 3.8, "K": -3.9, "M": 1.9, "F": 2.8, "P": -1.6,
+        "S": -0.8, "T": -0.7, "W": -0.9, "Y": -1.3, "V": 4.2,
+    },
+    # Hopp & Woods (1981) - 親水性スケール
+    "hopp_woods": {
+        "A": -0.5, "R": 3.0, "N": 0.2, "D": 3.0, "C": -1.0,
+        "Q": 0.2, "E": 3.0, "G": 0.0, "H": -0.5, "I": -1.8,
+        "L": -1.8, "K": 3.0, "M": -1.3, "F": -2.5, "P": 0.0,
+        "S": 0.3, "T": -0.4, "W": -3.4, "Y": -2.3, "V": -1.5,
+    },
+    # Eisenberg (1984) - consensus スケール
+    "eisenberg": {
+        "A": 0.62, "R": -2.53, "N": -0.78, "D": -0.90, "C": 0.29,
+        "Q": -0.85, "E": -0.74, "G": 0.48, "H": -0.40, "I": 1.38,
+        "L": 1.06, "K": -1.50, "M": 0.64, "F": 1.19, "P": 0.12,
+        "S": -0.18, "T": -0.05, "W": 0.81, "Y": 0.26, "V": 1.08,
+    },
+}
+
+# 不安定性指数のジペプチド重み (DIWV; Guruprasad et al., 1990)
+# 行が1残基目、列が2残基目 (どちらも AMINO_ACIDS の順)
+DIWV = np.array([
+    [  1.00,  44.94,  -7.49,   1.00,   1.00,   1.00,  -7.49,   1.00,   1.00,   1.00,   1.00,   1.00,  20.26,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00],  # A
+    [  1.00,   1.00,  20.26,   1.00,   1.00,   1.00,  33.60,   1.00,   1.00,  20.26,  33.60,   1.00,  20.26,  -6.54,   1.00,   1.00,  33.60,  -6.54,  24.68,   1.00],  # C
+    [  1.00,   1.00,   1.00,   1.00,  -6.54,   1.00,   1.00,   1.00,  -7.49,   1.00,   1.00,   1.00,   1.00,   1.00,  -6.54,  20.26, -14.03,   1.00,   1.00,   1.00],  # D
+    [  1.00,  44.94,  20.26,  33.60,   1.00,   1.00,  -6.54,  20.26,   1.00,   1.00,   1.00,   1.00,  20.26,  20.26,   1.00,  20.26,   1.00,   1.00, -14.03,   1.00],  # E
+    [  1.00,   1.00,  13.34,   1.00,   1.00,   1.00,   1.00,   1.00, -14.03,   1.00,   1.00,   1.00,  20.26,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,  33.60],  # F
+    [ -7.49,   1.00,   1.00,  -6.54,   1.00,  13.34,   1.00,  -7.49,  -7.49,   1.00,   1.00,  -7.49,   1.00,   1.00,   1.00,   1.00,  -7.49,   1.00,  13.34,  -7.49],  # G
+    [  1.00,   1.00,   1.00,   1.00,  -9.37,  -9.37,   1.00,  44.94,  24.68,   1.00,   1.00,  24.68,  -1.88,   1.00,   1.00,   1.00,  -6.54,   1.00,  -1.88,  44.94],  # H
+    [  1.00,   1.00,   1.00,  44.94,   1.00,   1.00,  13.34,   1.00,  -7.49,  20.26,   1.00,   1.00,  -1.88,   1.00,   1.00,   1.00,   1.00,  -7.49,   1.00,   1.00],  # I
+    [  1.00,   1.00,   1.00,   1.00,   1.00,  -7.49,   1.00,  -7.49,   1.00,  -7.49,  33.60,   1.00,  -6.54,  24.64,  33.60,   1.00,   1.00,  -7.49,   1.00,   1.00],  # K
+    [  1.00,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,  -7.49,   1.00,   1.00,   1.00,  20.26,  33.60,  20.26,   1.00,   1.00,   1.00,  24.68,   1.00],  # L
+    [ 13.34,   1.00,   1.00,   1.00,   1.00,   1.00,  58.28,   1.00,   1.00,   1.00,  -1.88,   1.00,  44.94,  -6.54,  -6.54,  44.94,  -1.88,   1.00,   1.00,  24.68],  # M
+    [  1.00,  -1.88,   1.00,   1.00, -14.03, -14.03,   1.00,  44.94,  24.68,   1.00,   1.00,   1.00,  -1.88,  -6.54,   1.00,   1.00,  -7.49,   1.00,  -9.37,   1.00],  # N
+    [ 20.26,  -6.54,  -6.54,  18.38,  20.26,   1.00,   1.00,   1.00,   1.00,   1.00,  -6.54,   1.00,  20.26,  20.26,  -6.54,  20.26,   1.00,  20.26,  -1.88,   1.00],  # P
+    [  1.00,  -6.54,  20.26,  20.26,  -6.54,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,  20.26,  20.26,   1.00,  44.94,   1.00,  -6.54,   1.00,  -6.54],  # Q
+    [  1.00,   1.00,   1.00,   1.00,   1.00,  -7.49,  20.26,   1.00,   1.00,   1.00,   1.00,  13.34,  20.26,  20.26,  58.28,  44.94,   1.00,   1.00,  58.28,  -6.54],  # R
+    [  1.00,  33.60,   1.00,  20.26,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,   1.00,  44.94,  20.26,  20.26,  20.26,   1.00,   1.00,   1.00,   1.00],  # S
+    [  1.00,   1.00,   1.00,  20.26,  13.34,  -7.49,   1.00,   1.00,   1.00,   1.00,   1.00, -14.03,   1.00,  -6.54,   1.00,   1.00,   1.00,   1.00, -14.03,   1.00],  # T
+    [  1.00,   1.00, -14.03,   1.00,   1.00,  -7.49,   1.00,   1.00,  -1.88,   1.00,   1.00,   1.00,  20.26,   1.00,   1.00,   1.00,  -7.49,   1.00,   1.00,  -6.54],  # V
+    [-14.03,   1.00,   1.00,   1.00,   1.00,  -9.37,  24.68,   1.00,   1.00,  13.34,  24.68,  13.34,   1.00,   1.00,   1.00,   1.00, -14.03,  -7.49,   1.00,   1.00],  # W
+    [ 24.68,   1.00,  24.68,  -6.54,   1.00,  -7.49,  13.34,   1.00,   1.00,   1.00,  44.94,   1.00,  13.34,   1.00, -15.91,   1.00,  -7.49,   1.00,  -9.37,  13.34],  # Y
+])
+
+_AA_INDEX = {aa: i for i, aa in enumerate(AMINO_ACIDS)}
+_CHARGED_INDEX = [_AA_INDEX[aa] for aa in POSITIVE_RESIDUES + NEGATIVE_RESIDUES]
+
+# バイト値 → 組成行列の列番号 (小文字も受け付ける)
+_SKIP = 254     # 空白・改行 (無視する)
+_UNKNOWN = 255  # 不明なアミノ酸
+_CODE_TABLE = np.full(256, _UNKNOWN, dtype=np.uint8)
+for _aa, _i in _AA_INDEX.items():
+    _CODE_TABLE[ord(_aa)] = _i
+    _CODE_TABLE[ord(_aa.lower())] = _i
+for _ch in " \t\r\n":
+    _CODE_TABLE[ord(_ch)] = _SKIP
+
+
+def _scale_vector(scale):
+    """{アミノ酸: 値} の辞書を AMINO_ACIDS 順の配列にする"""
+    return np.array([scale[aa] for aa in AMINO_ACIDS], dtype=np.float64)
+
+
+def encode_buffer(data, offsets):
+    """
+    連結された配列バイト列を残基コードに変換する。
+
+    Parameters
+    ----------
+    data : numpy.ndarray of uint8
+        全配列を連結したバイト列 (ASCII)
+    offsets : numpy.ndarray of int
+        各配列の開始位置。長さは配列数 + 1 (Arrow の文字列オフセットと同じ形式)
+
+    Returns
+    -------
+    codes : numpy.ndarray of uint8
+        残基コード (AMINO_ACIDS の列番号、空白は除去済み)
+    rows : numpy.ndarray of int64
+        各残基が属する配列の番号
+    lengths : numpy.ndarray of int64
+        各配列の長さ (空白を除く)
+
+    Raises
+    ------
+    ValueError
+        不明なアミノ酸が含まれる場合
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n = len(offsets) - 1
+    data = np.asarray(data, dtype=np.uint8)[offsets[0]:offsets[-1]]
+    codes = _CODE_TABLE[data]
+    rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+
+    unknown = codes == _UNKNOWN
+    if unknown.any():
+        chars = sorted({chr(b) for b in np.unique(data[unknown])})
+        raise ValueError(f"不明なアミノ酸: {', '.join(chars)}")
+
+    keep = codes != _SKIP
+    if not keep.all():
+        codes = codes[keep]
+        rows = rows[keep]
+    lengths = np.bincount(rows, minlength=n).astype(np.int64)
+    return codes, rows, lengths
+
+
+def encode_sequences(sequences):
+    """
+    配列のリストを残基コードに変換する。
+
+    Parameters
+    ----------
+    sequences : list of str
+        アミノ酸の一文字表記配列のリスト
+
+    Returns
+    -------
+    codes, rows, lengths
+        encode_buffer と同じ
+    """
+    raw_lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+    np.cumsum(raw_lengths, out=offsets[1:])
+    joined = "".join(sequences).encode("ascii", errors="replace")
+    data = np.frombuffer(joined, dtype=np.uint8)
+    return encode_buffer(data, offsets)
+
+
+def composition_matrix(codes, rows, n):
+    """
+    残基コードからアミノ酸組成の行列を作る。
+
+    Parameters
+    ----------
+    codes, rows : numpy.ndarray
+        encode_buffer / encode_sequences の戻り値
+    n : int
+        配列数
+
+    Returns
+    -------
+    numpy.ndarray, shape (n, 20)
+        各配列のアミノ酸出現回数 (列は AMINO_ACIDS の順)。
+        1行が amino_acid_composition() の結果に相当する。
+    """
+    flat = rows * len(AMINO_ACIDS) + codes
+    counts = np.bincount(flat, minlength=n * len(AMINO_ACIDS))
+    return counts.reshape(n, len(AMINO_ACIDS))
+
+
+def molecular_weight(counts, mass_type="monoisotopic"):
+    """
+    組成行列から分子量を一括計算する (calculate_mw の修飾なし版)。
+
+    Parameters
+    ----------
+    counts : numpy.ndarray, shape (n, 20)
+        composition_matrix の戻り値
+    mass_type : str
+        "monoisotopic" または "average"
+
+    Returns
+    -------
+    numpy.ndarray
+        分子量 (Da)
+    """
+    if mass_type == "monoisotopic":
+        masses, water = _scale_vector(MONOISOTOPIC_MASS), WATER_MONOISOTOPIC
+    elif mass_type == "average":
+        masses, water = _scale_vector(AVERAGE_MASS), WATER_AVERAGE
+    else:
+        raise ValueError(f"不明な質量タイプ: {mass_type} ('monoisotopic' または 'average' を指定)")
+    return counts @ masses + water
+
+
+def _get_pka_scale(pka_scale):
+    if pka_scale not in PKA_SCALES:
+        raise ValueError(f"不明なpKaスケール: {pka_scale} ({', '.join(PKA_SCALES)} から指定)")
+    return PKA_SCALES[pka_scale]
+
+
+def net_charge(counts, pH=7.0, pka_scale="EMBOSS"):
+    """
+    指定pHでの正味電荷を一括計算する (Henderson-Hasselbalch式)。
+
+    Parameters
+    ----------
+    counts : numpy.ndarray, shape (n, 20)
+        composition_matrix の戻り値
+    pH : float or numpy.ndarray
+        pH。配列の場合はペプチドごとのpH (長さ n)
+    pka_scale : str
+        PKA_SCALES のキー
+
+    Returns
+    -------
+    numpy.ndarray
+        正味電荷
+    """
+    pka = _get_pka_scale(pka_scale)
+    return _charge(counts[:, _CHARGED_INDEX], pH, pka)
+
+
+def _charge(charged, pH, pka):
+    """荷電残基の出現回数 (POSITIVE_RESIDUES + NEGATIVE_RESIDUES の順) から正味電荷を計算"""
+    pH = np.asarray(pH, dtype=np.float64)
+    n_pos = len(POSITIVE_RESIDUES)
+    pos_pka = np.array([pka[aa] for aa in POSITIVE_RESIDUES])
+    neg_pka = np.array([pka[aa] for aa in NEGATIVE_RESIDUES])
+
+    ph_col = pH[..., None]
+    positive = (charged[:, :n_pos] / (1.0 + 10.0 ** (ph_col - pos_pka))).sum(axis=1)
+    negative = (charged[:, n_pos:] / (1.0 + 10.0 ** (neg_pka - ph_col))).sum(axis=1)
+    n_term = 1.0 / (1.0 + 10.0 ** (pH - pka["Nterm"]))
+    c_term = 1.0 / (1.0 + 10.0 ** (pka["Cterm"] - pH))
+    return positive + n_term - negative - c_term
+
+
+def isoelectric_point(counts, pka_scale="EMBOSS", tolerance=1e-4):
+    """
+    等電点を全ペプチド同時の二分法で計算する。
+
+    正味電荷はpHに対して単調減少なので、[0, 14] の区間を
+    全ペプチドで同時に半分ずつ狭めていく。等電点は荷電残基の個数だけで
+    決まるため、個数の組み合わせが同じペプチドはまとめて1回だけ計算する。
+
+    Parameters
+    ----------
+    counts : numpy.ndarray, shape (n, 20)
+        composition_matrix の戻り値
+    pka_scale : str
+        PKA_SCALES のキー
+    tolerance : float
+        等電点の許容誤差 (pH単位)
+
+    Returns
+    -------
+    numpy.ndarray
+        等電点
+    """
+    pka = _get_pka_scale(pka_scale)
+    if counts.shape[0] == 0:
+        return np.zeros(0)
+    charged, inverse = _unique_rows(counts[:, _CHARGED_INDEX])
+
+    n = charged.shape[0]
+    low = np.zeros(n)
+    high = np.full(n, 14.0)
+    iterations = int(np.ceil(np.log2(14.0 / tolerance)))
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        positive = _charge(charged, mid, pka) > 0
+        low = np.where(positive, mid, low)
+        high = np.where(positive, high, mid)
+    return ((low + high) / 2)[inverse]
+
+
+def _unique_rows(matrix):
+    """
+    整数行列の重複しない行と、元の各行がどの行に対応するかを返す。
+
+    各行を混合基数の整数1個に詰めてから np.unique にかける
+    (axis=0 指定より大幅に速い)。int64 に収まらない場合のみ axis=0 を使う。
+    """
+    radix = matrix.max(axis=0).astype(np.int64) + 1
+    if np.prod(radix.astype(np.float64)) >= 2.0 ** 62:
+        unique, inverse = np.unique(matrix, axis=0, return_inverse=True)
+        return unique, inverse.reshape(-1)
+    place = np.concatenate(([1], np.cumprod(radix[:-1])))
+    _, first, inverse = np.unique(matrix @ place, return_index=True, return_inverse=True)
+    return matrix[first], inverse.reshape(-1)
+
+
+def gravy(counts, scale="kyte_doolittle"):
+    """
+    GRAVY (疎水性スケールの平均値) を一括計算する。
+
+    Parameters
+    ----------
+    counts : numpy.ndarray, shape (n, 20)
+        composition_matrix の戻り値
+    scale : str
+        HYDROPATHY_SCALES のキー
+
+    Returns
+    -------
+    numpy.ndarray
+        GRAVY 値 (空の配列は nan)
+    """
+    if scale not in HYDROPATHY_SCALES:
+        raise ValueError(f"不明な疎水性スケール: {scale} ({', '.join(HYDROPATHY_SCALES)} から指定)")
+    lengths = counts.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (counts @ _scale_vector(HYDROPATHY_SCALES[scale])) / lengths
+
+
+def aliphatic_index(counts):
+    """
+    脂肪族指数 (Ikai, 1980) を一括計算する。
+
+    100 * (x_A + 2.9 * x_V + 3.9 * (x_I + x_L))、x はモル分率。
+
+    Parameters
+    ----------
+    counts : numpy.ndarray, shape (n, 20)
+        composition_matrix の戻り値
+
+    Returns
+    -------
+    numpy.ndarray
+        脂肪族指数 (空の配列は nan)
+    """
+    lengths = counts.sum(axis=1)
+    weighted = (
+        counts[:, _AA_INDEX["A"]]
+        + 2.9 * counts[:, _AA_INDEX["V"]]
+        + 3.9 * (counts[:, _AA_INDEX["I"]] + counts[:, _AA_INDEX["L"]])
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 * weighted / lengths
+
+
+def instability_index(codes, rows, lengths):
+    """
+    不安定性指数 (Guruprasad et al., 1990) を一括計算する。
+
+    隣接残基のジペプチド重み DIWV の合計 * 10 / 配列長。
+    組成だけでは決まらないため、残基コード列から計算する。
+
+    Parameters
+    ----------
+    codes, rows, lengths : numpy.ndarray
+        encode_buffer / encode_sequences の戻り値
+
+    Returns
+    -------
+    numpy.ndarray
+        不安定性指数 (空の配列は nan)
+    """
+    n = len(lengths)
+    # 同じ配列内で隣り合う残基のペアだけを使う
+    same = rows[:-1] == rows[1:]
+    weights = DIWV[codes[:-1][same], codes[1:][same]]
+    total = np.bincount(rows[:-1][same], weights=weights, minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 10.0 * total / lengths
+
+
+def peptide_properties(sequences, pH=7.0, pka_scale="EMBOSS",
+                       hydropathy_scale="kyte_doolittle", mass_type="monoisotopic",
+                       proteome=None, max_mismatches=0):
+    """
+    ペプチド配列のリストから物性を一括計算する。
+
+    Parameters
+    ----------
+    sequences : list of str
+        アミノ酸の一文字表記配列のリスト
+    pH : float
+        正味電荷を計算するpH
+    pka_scale : str
+        PKA_SCALES のキー ("EMBOSS", "Lehninger", "Solomon", "Sillero", "Bjellqvist")
+    hydropathy_scale : str
+        HYDROPATHY_SCALES のキー
+    mass_type : str
+        "monoisotopic" または "average"
+    proteome : ProteomeIndex, optional
+        指定すると、参照プロテオームに出現するかを "self" 列に追加する
+    max_mismatches : int
+        "self" 判定で許容するミスマッチ数
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        列名 → 値の配列。pandas.DataFrame にそのまま渡せる。
+    """
+    codes, rows, lengths = encode_sequences(sequences)
+    properties = properties_from_codes(codes, rows, lengths, pH, pka_scale,
+                                       hydropathy_scale, mass_type)
+    if proteome is not None:
+        properties["self"] = proteome.is_self(sequences, max_mismatches)
+    return properties
+
+
+def properties_from_codes(codes, rows, lengths, pH=7.0, pka_scale="EMBOSS",
+                          hydropathy_scale="kyte_doolittle", mass_type="monoisotopic"):
+    """
+    残基コード列から物性を一括計算する (peptide_properties の本体)。
+
+    Parameters
+    ----------
+    codes, rows, lengths : numpy.ndarray
+        encode_buffer / encode_sequences の戻り値
+    その他
+        peptide_properties と同じ
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        列名 → 値の配列
+    """
+    counts = composition_matrix(codes, rows, len(lengths))
+    return {
+        "length": lengths,
+        "molecular_weight": molecular_weight(counts, mass_type),
+        "net_charge": net_charge(counts, pH, pka_scale),
+        "isoelectric_point": isoelectric_point(counts, pka_scale),
+        "gravy": gravy(counts, hydropathy_scale),
+        "aliphatic_index": aliphatic_index(counts),
+        "instability_index": instability_index(codes, rows, lengths),
+    }
+
+
+if __name__ == "__main__":
+    # 使用例
+    test_sequences = [
+        "SIINFEKL",   # OVA257-264
+        "GILGFVFTL",  # Influenza M1 (HLA-A*02:01)
+        "NLVPMVATV",  # CMV pp65 (HLA-A*02:01)
+        "GLCTLVAML",  # EBV BMLF1 (HLA-A*02:01)
+        "YLQPRTFLL",  # SARS-CoV-2 Spike (HLA-A*02:01)
+    ]
+
+    props = peptide_properties(test_sequences)
+    for i, seq in enumerate(test_sequences):
+        print(f"配列: {seq}")
+        print(f"  等電点:         {props['isoelectric_point'][i]:.2f}")
+        print(f"  正味電荷(pH7):  {props['net_charge'][i]:+.2f}")
+        print(f"  GRAVY:          {props['gravy'][i]:.3f}")
+        print(f"  脂肪族指数:     {props['aliphatic_index'][i]:.1f}")
+        print(f"  不安定性指数:   {props['instability_index'][i]:.2f}")
+        print()
@@ -0,0 +1,412 @@
+"""
+プロテオーム検索インデックスモジュール
+
+ネオアンチゲン候補が参照プロテオーム（ヒト全タンパク質など）に
+そのまま（または1ミスマッチで）含まれる「自己ペプチド」かどうかを判定する。
+
+FASTA の全配列を区切り文字付きで連結し、接尾辞配列（suffix array）を作って
+ディレクトリに保存する。読み込みはメモリマップで行うので、一度作れば
+起動のたびに作り直す必要はない。検索は同じ長さのペプチドをまとめて
+numpy で二分探索する。
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 連結テキスト上の区切り文字（タンパク質の境界）
+SEPARATOR = 0
+
+# 接尾辞配列は先頭 max_length 文字までで並べる（それより長い検索は不可）
+DEFAULT_MAX_LENGTH = 64
+
+# 一度に検索するペプチド数（メモリ使用量の上限）
+# ミスマッチ検索は1本あたりの候補位置が多いので小さくする
+CHUNK_SIZE = 100_000
+MISMATCH_CHUNK_SIZE = 10_000
+
+# 先頭 PREFIX_LENGTH 文字ごとの接尾辞配列の範囲を前計算し、二分探索の初期範囲にする
+PREFIX_LENGTH = 3
+_ALPHABET_SIZE = 27  # 区切り文字 + A-Z
+
+# バイト値 → 残基コード (A-Z → 1-26、小文字も受け付ける)
+_CODE_TABLE = np.zeros(256, dtype=np.uint8)
+for _i in range(26):
+    _CODE_TABLE[ord("A") + _i] = _i + 1
+    _CODE_TABLE[ord("a") + _i] = _i + 1
+
+
+def read_fasta(filepath):
+    """
+    FASTAファイルを読み込み、(ID, 配列) を順に返す。
+
+    ID はヘッダ行の最初の空白までの部分。
+    """
+    header = None
+    seq_parts = []
+    with open(filepath) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith(">"):
+                if header is not None:
+                    yield header, "".join(seq_parts)
+                header = line[1:].split()[0] if line[1:].strip() else ""
+                seq_parts = []
+            elif line:
+                seq_parts.append(line)
+        if header is not None:
+            yield header, "".join(seq_parts)
+
+
+def _encode(sequence):
+    return _CODE_TABLE[np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)]
+
+
+def _prefix_keys(text, positions):
+    """positions から始まる先頭 PREFIX_LENGTH 文字を1つの整数にまとめる (末尾は区切り文字扱い)"""
+    keys = np.zeros(len(positions), dtype=np.int64)
+    for j in range(PREFIX_LENGTH):
+        idx = positions + j
+        inside = idx < len(text)
+        codes = np.where(inside, text[np.where(inside, idx, 0)], SEPARATOR)
+        keys = keys * _ALPHABET_SIZE + codes
+    return keys
+
+
+def build_prefix_buckets(text, suffix_array, chunk_size=1_000_000):
+    """
+    先頭 PREFIX_LENGTH 文字が key である接尾辞の範囲 [buckets[key], buckets[key + 1]) を返す。
+    """
+    counts = np.zeros(_ALPHABET_SIZE ** PREFIX_LENGTH, dtype=np.int64)
+    for start in range(0, len(suffix_array), chunk_size):
+        positions = np.asarray(suffix_array[start:start + chunk_size], dtype=np.int64)
+        counts += np.bincount(_prefix_keys(text, positions), minlength=len(counts))
+    buckets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=buckets[1:])
+    return buckets
+
+
+def build_suffix_array(text, max_length=DEFAULT_MAX_LENGTH):
+    """
+    接尾辞配列を prefix doubling で作る。
+
+    各接尾辞の先頭 max_length 文字までの順位で並べる
+    (それ以降が異なる接尾辞の順序は問わない)。
+
+    Parameters
+    ----------
+    text : numpy.ndarray of uint8
+        残基コード列
+    max_length : int
+        並べ替えに使う先頭文字数
+
+    Returns
+    -------
+    numpy.ndarray
+        接尾辞の開始位置を辞書順に並べた配列
+    """
+    n = len(text)
+    # 残基コード (0-26) のままだと順位が n を超えうるので、0 からの連番に詰める
+    _, rank = np.unique(text, return_inverse=True)
+    rank = rank.astype(np.int64).ravel()
+    sa = np.argsort(rank, kind="stable")
+    h = 1
+    while h < max_length:
+        # 先頭 h 文字の順位と、h 文字先からの h 文字の順位を組にして並べ替える
+        second = np.zeros(n, dtype=np.int64)
+        second[:n - h] = rank[h:] + 1
+        key = rank * (n + 2) + second
+        sa = np.argsort(key, kind="stable")
+        sorted_key = key[sa]
+        new_rank = np.empty(n, dtype=np.int64)
+        new_rank[sa] = np.concatenate(([0], np.cumsum(sorted_key[1:] != sorted_key[:-1])))
+        rank = new_rank
+        if rank[sa[-1]] == n - 1:
+            # 全接尾辞の順位が確定
+            break
+        h *= 2
+    dtype = np.int32 if n < 2 ** 31 else np.int64
+    return sa.astype(dtype)
+
+
+class ProteomeIndex:
+    """
+    参照プロテオームの接尾辞配列インデックス。
+
+    ProteomeIndex.build() で作成して保存し、ProteomeIndex.load() で読み込む。
+    """
+
+    def __init__(self, text, suffix_array, buckets, starts, ids, max_length):
+        self.text = text
+        self.suffix_array = suffix_array
+        self.buckets = buckets
+        self.starts = starts
+        self.ids = ids
+        self.max_length = max_length
+
+    @classmethod
+    def build(cls, fasta_path, index_dir, max_length=DEFAULT_MAX_LENGTH):
+        """
+        FASTAファイルからインデックスを作成し、index_dir に保存する。
+
+        Parameters
+        ----------
+        fasta_path : str
+            参照プロテオームのFASTAファイル
+        index_dir : str
+            保存先ディレクトリ
+        max_length : int
+            検索できるペプチドの最大長
+
+        Returns
+        -------
+        ProteomeIndex
+        """
+        ids = []
+        parts = []
+        starts = []
+        pos = 0
+        for protein_id, sequence in read_fasta(fasta_path):
+            ids.append(protein_id)
+            starts.append(pos)
+            parts.append(_encode(sequence))
+            parts.append(np.array([SEPARATOR], dtype=np.uint8))
+            pos += len(sequence) + 1
+        text = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+        suffix_array = build_suffix_array(text, max_length)
+        buckets = build_prefix_buckets(text, suffix_array)
+        starts = np.array(starts, dtype=np.int64)
+
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(index_dir / "text.npy", text)
+        np.save(index_dir / "suffix_array.npy", suffix_array)
+        np.save(index_dir / "buckets.npy", buckets)
+        np.save(index_dir / "starts.npy", starts)
+        meta = {"ids": ids, "max_length": max_length, "fasta": str(fasta_path)}
+        (index_dir / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        return cls(text, suffix_array, buckets, starts, ids, max_length)
+
+    @classmethod
+    def load(cls, index_dir):
+        """保存済みのインデックスをメモリマップで読み込む"""
+        index_dir = Path(index_dir)
+        meta = json.loads((index_dir / "meta.json").read_text(encoding="utf-8"))
+        text = np.load(index_dir / "text.npy", mmap_mode="r")
+        suffix_array = np.load(index_dir / "suffix_array.npy", mmap_mode="r")
+        buckets = np.load(index_dir / "buckets.npy")
+        starts = np.load(index_dir / "starts.npy")
+        return cls(text, suffix_array, buckets, starts, meta["ids"], meta["max_length"])
+
+    def _windows(self, positions, length):
+        """text[positions + j] (j < length) を集める。末尾を越えた部分は区切り文字"""
+        idx = positions[:, None] + np.arange(length)
+        inside = idx < len(self.text)
+        windows = self.text[np.where(inside, idx, 0)]
+        windows[~inside] = SEPARATOR
+        return windows
+
+    def _compare(self, sa_index, queries):
+        """接尾辞 suffix_array[sa_index] の先頭と queries を比較し、-1/0/1 を返す"""
+        windows = self._windows(self.suffix_array[sa_index].astype(np.int64), queries.shape[1])
+        diff = windows.astype(np.int16) - queries
+        nonzero = diff != 0
+        first = nonzero.argmax(axis=1)
+        return np.sign(diff[np.arange(len(diff)), first]) * nonzero.any(axis=1)
+
+    def _search_range(self, queries):
+        """同じ長さのクエリ (残基コード行列) について、一致する接尾辞配列の範囲 [lower, upper) を返す"""
+        if queries.shape[1] >= PREFIX_LENGTH:
+            key = np.zeros(len(queries), dtype=np.int64)
+            for j in range(PREFIX_LENGTH):
+                key = key * _ALPHABET_SIZE + queries[:, j]
+            start, stop = self.buckets[key], self.buckets[key + 1]
+        else:
+            start = np.zeros(len(queries), dtype=np.int64)
+            stop = np.full(len(queries), len(self.suffix_array), dtype=np.int64)
+
+        bounds = []
+        for upper in (False, True):
+            lo = start.copy()
+            hi = stop.copy()
+            active = lo < hi
+            while active.any():
+                mid = (lo + hi) // 2
+                cmp = np.zeros(len(queries), dtype=np.int64)
+                cmp[active] = self._compare(mid[active], queries[active])
+                go_right = (cmp <= 0) if upper else (cmp < 0)
+                lo = np.where(active & go_right, mid + 1, lo)
+                hi = np.where(active & ~go_right, mid, hi)
+                active = lo < hi
+            bounds.append(lo)
+        return bounds[0], bounds[1]
+
+    def _encode_group(self, peptides):
+        length = len(peptides[0])
+        if length > self.max_length:
+            raise ValueError(f"ペプチドが長すぎます: {length} (max_length={self.max_length})")
+        data = np.frombuffer("".join(peptides).encode("ascii"), dtype=np.uint8)
+        codes = _CODE_TABLE[data]
+        if (codes == SEPARATOR).any():
+            chars = sorted({chr(c) for c in np.unique(data[codes == SEPARATOR])})
+            raise ValueError(f"不明なアミノ酸: {', '.join(chars)}")
+        return codes.reshape(len(peptides), length).astype(np.int16)
+
+    def _groups(self, peptides, max_mismatches):
+        """ペプチドを長さごとに分け、(元の番号の配列, ペプチドのリスト) をチャンク単位で返す"""
+        chunk_size = CHUNK_SIZE if max_mismatches == 0 else MISMATCH_CHUNK_SIZE
+        by_length = {}
+        for i, pep in enumerate(peptides):
+            by_length.setdefault(len(pep), []).append(i)
+        for length, indices in by_length.items():
+            if length == 0:
+                continue
+            for start in range(0, len(indices), chunk_size):
+                chunk = np.array(indices[start:start + chunk_size], dtype=np.int64)
+                yield chunk, [peptides[i] for i in chunk]
+
+    def _exact_hits(self, queries):
+        """完全一致する (クエリ番号, 位置) の配列を返す"""
+        lower, upper = self._search_range(queries)
+        counts = upper - lower
+        query_idx = np.repeat(np.arange(len(queries)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = self.suffix_array[lower[query_idx] + offsets].astype(np.int64)
+        return query_idx, positions
+
+    def _mismatch_hits(self, queries, max_mismatches):
+        """
+        max_mismatches 個以下のミスマッチで一致する (クエリ番号, 位置) を返す。
+
+        鳩の巣原理: クエリを max_mismatches + 1 個に分割すると、
+        条件を満たす出現ではどれか1片が完全一致する。各片を完全一致検索して
+        候補位置を集め、全長のミスマッチ数を数えて確認する。
+        """
+        length = queries.shape[1]
+        if max_mismatches >= length:
+            # 1残基以上の片に分けられない (呼び出し側で _all_match として扱う)
+            raise ValueError(f"ミスマッチ数がペプチド長以上です: {max_mismatches} >= {length}")
+        n_pieces = max_mismatches + 1
+        edges = np.linspace(0, length, n_pieces + 1).astype(int)
+        query_parts = []
+        position_parts = []
+        for a, b in zip(edges[:-1], edges[1:]):
+            q_idx, pos = self._exact_hits(np.ascontiguousarray(queries[:, a:b]))
+            pos = pos - a
+            ok = pos >= 0
+            query_parts.append(q_idx[ok])
+            position_parts.append(pos[ok])
+        q_idx = np.concatenate(query_parts)
+        pos = np.concatenate(position_parts)
+
+        # 同じ候補を複数の片で拾った場合の重複を除く
+        key = np.unique(q_idx * (len(self.text) + 1) + pos)
+        q_idx = key // (len(self.text) + 1)
+        pos = key % (len(self.text) + 1)
+
+        windows = self._windows(pos, length)
+        mismatches = (windows.astype(np.int16) != queries[q_idx]).sum(axis=1)
+        crosses_boundary = (windows == SEPARATOR).any(axis=1)
+        ok = (mismatches <= max_mismatches) & ~crosses_boundary
+        return q_idx[ok], pos[ok]
+
+    def _protein_lengths(self):
+        ends = np.append(self.starts[1:], len(self.text)) - 1
+        return ends - self.starts
+
+    def _all_match(self, length, max_mismatches):
+        """
+        ミスマッチ数がペプチド長以上なら、長さ length 以上のどのタンパク質の
+        どの位置とも一致する。その場合にタンパク質番号の配列を返す (それ以外は None)
+        """
+        if max_mismatches < length:
+            return None
+        return np.flatnonzero(self._protein_lengths() >= length)
+
+    def _hits(self, queries, max_mismatches):
+        if max_mismatches == 0:
+            return self._exact_hits(queries)
+        return self._mismatch_hits(queries, max_mismatches)
+
+    def is_self(self, peptides, max_mismatches=0):
+        """
+        ペプチドがプロテオーム中に出現するかを一括判定する。
+
+        Parameters
+        ----------
+        peptides : list of str
+            ペプチド配列のリスト
+        max_mismatches : int
+            許容するミスマッチ数 (置換のみ)
+
+        Returns
+        -------
+        numpy.ndarray of bool
+            peptides と同じ順の判定結果
+        """
+        result = np.zeros(len(peptides), dtype=bool)
+        for indices, group in self._groups(peptides, max_mismatches):
+            proteins = self._all_match(len(group[0]), max_mismatches)
+            if proteins is not None:
+                self._encode_group(group)  # 不明なアミノ酸の検査
+                result[indices] = len(proteins) > 0
+                continue
+            q_idx, _ = self._hits(self._encode_group(group), max_mismatches)
+            result[indices[np.unique(q_idx)]] = True
+        return result
+
+    def find(self, peptides, max_mismatches=0):
+        """
+        ペプチドが出現するタンパク質のIDを一括検索する。
+
+        Parameters
+        ----------
+        peptides : list of str
+            ペプチド配列のリスト
+        max_mismatches : int
+            許容するミスマッチ数 (置換のみ)
+
+        Returns
+        -------
+        list of list of str
+            peptides と同じ順の、出現するタンパク質IDのリスト
+        """
+        result = [[] for _ in peptides]
+        for indices, group in self._groups(peptides, max_mismatches):
+            proteins = self._all_match(len(group[0]), max_mismatches)
+            if proteins is not None:
+                self._encode_group(group)  # 不明なアミノ酸の検査
+                for i in indices:
+                    result[i] = [self.ids[p] for p in proteins]
+                continue
+            q_idx, pos = self._hits(self._encode_group(group), max_mismatches)
+            protein = np.searchsorted(self.starts, pos, side="right") - 1
+            pairs = np.unique(np.stack([q_idx, protein], axis=1), axis=0)
+            for q, p in pairs:
+                result[indices[q]].append(self.ids[p])
+        return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("使い方:")
+        print("  python proteome_index.py build <FASTAファイル> <保存先ディレクトリ>")
+        print("  python proteome_index.py query <インデックスディレクトリ> <ペプチド>...")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "build":
+        index = ProteomeIndex.build(sys.argv[2], sys.argv[3])
+        print(f"✅ インデックス作成: {sys.argv[3]} ({len(index.ids)}配列, {len(index.text):,}残基)")
+    elif command == "query":
+        index = ProteomeIndex.load(sys.argv[2])
+        peptides = sys.argv[3:]
+        exact = index.find(peptides)
+        one_mismatch = index.find(peptides, max_mismatches=1)
+        for pep, hits, near in zip(peptides, exact, one_mismatch):
+            print(f"{pep}: 完全一致 {len(hits)}件 {hits[:5]} / 1ミスマッチ以内 {len(near)}件")
+    else:
+        print(f"不明なコマンド: {command}")
+        sys.exit(1)
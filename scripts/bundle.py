@@ -0,0 +1,486 @@
+"""
+要約バンドルモジュール
+
+summaries/ に散らばった要約テンプレート(*.md)と抽出テキスト(*_extracted.txt)を
+1つの SQLite ファイルにまとめ、オフラインで素早く閲覧・検索できるようにする。
+
+- entries: 要約1件ごとのメタデータと Markdown 本文
+- authors / sections: 著者・セクション単位の絞り込み用テーブル（前計算）
+- search: セクション本文と書誌情報（タイトル・著者・雑誌・DOI）の全文検索
+  （FTS5 trigram。使えない環境では LIKE）。自動生成の「関連論文」は検索しない
+- sources: 元ファイルの (サイズ, 更新時刻, SHA-1)。stat が変わったファイルだけ
+  ハッシュを取り、中身が変わっていた要約だけを作り直す
+
+更新は要約単位の差分なので、論文1本を追加したときの再構築は
+コーパスの大きさによらず数ミリ秒で終わる。
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+
+SUMMARY_SUFFIX = ".md"
+EXTRACTED_SUFFIX = "_extracted.txt"
+# バンドルに含めないファイル（インデックスと空テンプレート）
+EXCLUDED_FILES = ("index.md",)
+EXCLUDED_SUFFIXES = ("_template.md",)
+# テンプレート生成時に自動で記入されるセクション（他の論文のタイトルが並ぶので検索しない）
+GENERATED_SECTIONS = ("関連論文",)
+# タイトル・著者・雑誌・DOI を検索するための擬似セクション
+METADATA_SECTION = "書誌情報"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    entry TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sources_entry ON sources(entry);
+CREATE TABLE IF NOT EXISTS entries (
+    entry TEXT PRIMARY KEY,
+    title TEXT,
+    authors TEXT,
+    journal TEXT,
+    year INTEGER,
+    doi TEXT,
+    pdf TEXT,
+    created TEXT,
+    one_liner TEXT,
+    paper_sections TEXT,
+    markdown TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_year ON entries(year);
+CREATE TABLE IF NOT EXISTS authors (
+    entry TEXT NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS authors_name ON authors(name);
+CREATE INDEX IF NOT EXISTS authors_entry ON authors(entry);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    entry TEXT NOT NULL,
+    name TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_name ON sections(name);
+CREATE INDEX IF NOT EXISTS sections_entry ON sections(entry);
+"""
+
+# 日本語は空白で区切られないため trigram で部分一致検索する
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(body, tokenize='trigram')"
+
+_PLACEHOLDER = re.compile(r"^\[[^\]]*\]$")
+_PLACEHOLDER_LINE = re.compile(
+    r"^\s*(?:[-*>]|\d+\.)?\s*(?:\*\*[^*]+\*\*:\s*)?\[[^\]]*\]\s*$"
+    r"|^\|.*\|\s*\[[^\]]*\]\s*\|$"
+)
+# 本文として扱わない構造だけの行（小見出し・表の区切り・水平線・作成日のフッタ）
+_STRUCTURE_LINE = re.compile(r"^(?:#+ .*|-{3,}|\*要約作成日: .*\*)$")
+_TABLE_SEPARATOR = re.compile(r"^\|[-:\s|]+\|$")
+_TABLE_ROW = re.compile(r"^\|\s*([^|]+?)\s*\|\s*(.*?)\s*\|$")
+_META_LINE = re.compile(r"^\s+(\S[^:]*):\s*(.*)$")
+_SECTION_LINE = re.compile(r"^\s+-\s+(.+?)\s+\(\d+文字\)$")
+_AUTHOR_SPLIT = re.compile(r"\s*(?:[,;、]|\band\b|&)\s*")
+_YEAR = re.compile(r"\b(19\d{2}|20\d{2})\b")
+_DATE_PREFIX = re.compile(r"^(\d{4}-\d{2}-\d{2})_")
+
+
+@dataclass
+class BundleEntry:
+    """バンドル内の要約1件"""
+    entry: str
+    title: str = ""
+    authors: str = ""
+    journal: str = ""
+    year: int | None = None
+    doi: str = ""
+    created: str = ""
+    one_liner: str = ""
+    matched_sections: list = field(default_factory=list)
+
+
+@dataclass
+class BundleStats:
+    """update() の結果"""
+    scanned: int = 0
+    rebuilt: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+
+def entry_for(filename: str) -> str | None:
+    """ファイル名から属する要約のファイル名を求める（対象外なら None）"""
+    if filename in EXCLUDED_FILES or filename.endswith(EXCLUDED_SUFFIXES):
+        return None
+    if filename.endswith(EXTRACTED_SUFFIX):
+        return filename[: -len(EXTRACTED_SUFFIX)] + SUMMARY_SUFFIX
+    if filename.endswith(SUMMARY_SUFFIX):
+        return filename
+    return None
+
+
+def _clean(value: str) -> str:
+    """テンプレートの [プレースホルダ] を空文字にする"""
+    value = value.strip()
+    return "" if _PLACEHOLDER.match(value) else value
+
+
+def parse_summary(text: str) -> tuple:
+    """
+    要約 Markdown からメタデータとセクションを取り出す。
+
+    Returns:
+        (メタデータの辞書, [(セクション名, 本文), ...])
+        本文からはテンプレートのプレースホルダ行を除く。自動生成のセクションは含めない
+    """
+    meta = {}
+    sections = []
+    name = None
+    body = []
+    for line in text.splitlines():
+        if line.startswith("# ") and "title" not in meta:
+            meta["title"] = _clean(line[2:])
+            continue
+        if line.startswith("## "):
+            if name is not None:
+                sections.append((name, "\n".join(body).strip()))
+            name = line[3:].strip()
+            body = []
+            continue
+        if name is None:
+            m = _TABLE_ROW.match(line)
+            if m:
+                meta[m.group(1)] = _clean(m.group(2))
+            continue
+        if not _PLACEHOLDER_LINE.match(line):
+            body.append(line)
+    if name is not None:
+        sections.append((name, "\n".join(body).strip()))
+
+    sections = [(n, b) for n, b in sections if n not in GENERATED_SECTIONS and _has_content(b)]
+    return {
+        "title": meta.get("title", ""),
+        "authors": meta.get("著者", ""),
+        "journal": meta.get("雑誌", ""),
+        "year": meta.get("年", ""),
+        "doi": meta.get("DOI", ""),
+    }, sections
+
+
+def _has_content(body: str) -> bool:
+    """プレースホルダを除いた後に、見出しや表の枠以外の記述が残っているか"""
+    lines = [line.strip() for line in body.splitlines() if line.strip()]
+    for i, line in enumerate(lines):
+        if _STRUCTURE_LINE.match(line) or _TABLE_SEPARATOR.match(line):
+            continue
+        # 表の見出し行（次の行が区切り行）
+        if i + 1 < len(lines) and line.startswith("|") and _TABLE_SEPARATOR.match(lines[i + 1]):
+            continue
+        return True
+    return False
+
+
+def parse_extracted(text: str) -> tuple:
+    """
+    抽出テキスト(paper_to_text の出力)の見出し部分からメタデータを取り出す。
+
+    Returns:
+        (メタデータの辞書, 検出されたセクション名のリスト)
+    """
+    labels = {"タイトル": "title", "著者": "authors", "雑誌": "journal",
+              "年": "year", "DOI": "doi", "ファイル": "pdf"}
+    meta = {}
+    section_names = []
+    block = None
+    for line in text.splitlines():
+        if line == "本文":
+            break
+        if line.startswith("【"):
+            block = line
+            continue
+        if block == "【メタデータ】":
+            m = _META_LINE.match(line)
+            if m and m.group(1) in labels:
+                meta[labels[m.group(1)]] = m.group(2).strip()
+        elif block == "【検出されたセクション】":
+            m = _SECTION_LINE.match(line)
+            if m:
+                section_names.append(m.group(1))
+    return meta, section_names
+
+
+def split_authors(authors: str) -> list:
+    """著者文字列を1人ずつに分ける"""
+    names = []
+    for name in _AUTHOR_SPLIT.split(authors):
+        name = name.strip(" .")
+        if name and name.lower() not in ("et al", "others") and name not in names:
+            names.append(name)
+    return names
+
+
+def _file_hash(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+class SummaryBundle:
+    """
+    summaries/ の要約をまとめた SQLite バンドル。
+
+    Args:
+        path: バンドルファイル（SQLite）
+        summaries_dir: 要約が置かれたディレクトリ
+    """
+
+    def __init__(self, path: Path, summaries_dir: Path):
+        self.path = path
+        self.summaries_dir = summaries_dir
+        path.parent.mkdir(exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        try:
+            self.conn.execute(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # FTS5 / trigram がない SQLite では LIKE で検索する
+            self.has_fts = False
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _scan(self, names: list | None) -> dict:
+        """対象ファイルを stat する（names 指定時はその要約のファイルだけ）"""
+        if names is None:
+            candidates = []
+            try:
+                with os.scandir(self.summaries_dir) as it:
+                    candidates = [e.name for e in it if e.is_file()]
+            except FileNotFoundError:
+                pass
+        else:
+            candidates = []
+            for name in names:
+                entry = entry_for(name)
+                if entry:
+                    candidates += [entry, entry[: -len(SUMMARY_SUFFIX)] + EXTRACTED_SUFFIX]
+
+        found = {}
+        for name in candidates:
+            entry = entry_for(name)
+            if entry is None:
+                continue
+            try:
+                st = (self.summaries_dir / name).stat()
+            except OSError:
+                continue
+            found[name] = (entry, st.st_size, st.st_mtime_ns)
+        return found
+
+    def update(self, names: list | None = None) -> BundleStats:
+        """
+        変更された要約だけをバンドルに反映する。
+
+        Args:
+            names: 更新する要約（または抽出テキスト）のファイル名。
+                None なら summaries/ 全体を stat して差分を探す
+
+        Returns:
+            BundleStats
+        """
+        stats = BundleStats()
+        found = self._scan(names)
+        stats.scanned = len(found)
+
+        if names is None:
+            known = {
+                row[0]: row[1:]
+                for row in self.conn.execute("SELECT path, entry, size, mtime_ns, sha1 FROM sources")
+            }
+        else:
+            paths = {
+                entry[: -len(SUMMARY_SUFFIX)] + suffix
+                for entry in {entry_for(n) for n in names} - {None}
+                for suffix in (SUMMARY_SUFFIX, EXTRACTED_SUFFIX)
+            }
+            known = {}
+            for path in paths:
+                row = self.conn.execute(
+                    "SELECT entry, size, mtime_ns, sha1 FROM sources WHERE path = ?", (path,)
+                ).fetchone()
+                if row:
+                    known[path] = row
+
+        dirty = set()
+        new_sources = {}
+        for path, (entry, size, mtime_ns) in found.items():
+            old = known.get(path)
+            if old and old[1] == size and old[2] == mtime_ns:
+                continue
+            digest = _file_hash(self.summaries_dir / path)
+            new_sources[path] = (entry, size, mtime_ns, digest)
+            # touch されただけなら stat だけ更新し、作り直さない
+            if not old or old[3] != digest:
+                dirty.add(entry)
+        for path, (entry, *_rest) in known.items():
+            if path not in found:
+                dirty.add(entry)
+
+        with self.conn:
+            for path in known.keys() - found.keys():
+                self.conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sources (path, entry, size, mtime_ns, sha1) VALUES (?, ?, ?, ?, ?)",
+                [(path, *values) for path, values in new_sources.items()],
+            )
+            for entry in sorted(dirty):
+                if self._rebuild_entry(entry):
+                    stats.rebuilt += 1
+                else:
+                    stats.removed += 1
+
+        entries = {entry for entry, _, _ in found.values()}
+        stats.unchanged = len(entries - dirty)
+        return stats
+
+    def _delete_entry(self, entry: str):
+        if self.has_fts:
+            self.conn.execute(
+                "DELETE FROM search WHERE rowid IN (SELECT id FROM sections WHERE entry = ?)", (entry,)
+            )
+        for table in ("entries", "authors", "sections"):
+            self.conn.execute(f"DELETE FROM {table} WHERE entry = ?", (entry,))
+
+    def _rebuild_entry(self, entry: str) -> bool:
+        """要約1件を作り直す（ファイルがなくなっていれば削除して False）"""
+        self._delete_entry(entry)
+        summary_path = self.summaries_dir / entry
+        extracted_path = self.summaries_dir / (entry[: -len(SUMMARY_SUFFIX)] + EXTRACTED_SUFFIX)
+        markdown = summary_path.read_text(encoding="utf-8") if summary_path.exists() else ""
+        extracted = extracted_path.read_text(encoding="utf-8") if extracted_path.exists() else ""
+        if not markdown and not extracted:
+            return False
+
+        meta, sections = parse_summary(markdown)
+        extracted_meta, paper_sections = parse_extracted(extracted)
+        # 要約側が未記入の項目は抽出テキストの値で補う
+        for key, value in extracted_meta.items():
+            if not meta.get(key):
+                meta[key] = value
+        year = _YEAR.search(meta.get("year", ""))
+        created = _DATE_PREFIX.match(entry)
+        one_liner = next((b for n, b in sections if n == "一言まとめ"), "")
+
+        self.conn.execute(
+            "INSERT INTO entries (entry, title, authors, journal, year, doi, pdf, created,"
+            " one_liner, paper_sections, markdown) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry, meta.get("title", ""), meta.get("authors", ""), meta.get("journal", ""),
+                int(year.group(1)) if year else None, meta.get("doi", ""), meta.get("pdf", ""),
+                created.group(1) if created else "", one_liner.lstrip("> ").strip(),
+                "\n".join(paper_sections), markdown,
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO authors (entry, name) VALUES (?, ?)",
+            [(entry, name) for name in split_authors(meta.get("authors", ""))],
+        )
+        bibliography = "\n".join(
+            v for v in (meta.get(k, "") for k in ("title", "authors", "journal", "doi")) if v
+        )
+        if bibliography:
+            sections.append((METADATA_SECTION, bibliography))
+        for name, body in sections:
+            cur = self.conn.execute(
+                "INSERT INTO sections (entry, name, body) VALUES (?, ?, ?)", (entry, name, body)
+            )
+            if self.has_fts:
+                self.conn.execute("INSERT INTO search (rowid, body) VALUES (?, ?)", (cur.lastrowid, body))
+        return True
+
+    def search(self, text: str = "", year: int | tuple | None = None,
+               author: str = "", section: str = "", limit: int = 20) -> list:
+        """
+        要約を検索する。
+
+        Args:
+            text: 本文の検索語（部分一致）
+            year: 出版年、または (開始年, 終了年)
+            author: 著者名（部分一致、大文字小文字を区別しない）
+            section: 検索対象を絞るセクション名（例: "手法"。書誌情報は METADATA_SECTION）
+            limit: 返す件数
+
+        Returns:
+            BundleEntry のリスト（要約作成日の新しい順）
+        """
+        where = []
+        params = []
+        if year is not None:
+            lo, hi = year if isinstance(year, tuple) else (year, year)
+            where.append("e.year BETWEEN ? AND ?")
+            params += [lo, hi]
+        if author:
+            where.append("e.entry IN (SELECT entry FROM authors WHERE name LIKE ?)")
+            params.append(f"%{author}%")
+
+        section_filter = []
+        section_params = []
+        if section:
+            section_filter.append("s.name = ?")
+            section_params.append(section)
+        if text:
+            if self.has_fts and len(text) >= 3:
+                section_filter.append("s.id IN (SELECT rowid FROM search WHERE search MATCH ?)")
+                section_params.append('"' + text.replace('"', '""') + '"')
+            else:
+                section_filter.append("s.body LIKE ?")
+                section_params.append(f"%{text}%")
+
+        sql = "SELECT e.entry, e.title, e.authors, e.journal, e.year, e.doi, e.created, e.one_liner"
+        if section_filter:
+            sql += ", group_concat(s.name, '\n') FROM entries e JOIN sections s ON s.entry = e.entry"
+            where = section_filter + where
+            params = section_params + params
+        else:
+            sql += ", NULL FROM entries e"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if section_filter:
+            sql += " GROUP BY e.entry"
+        sql += " ORDER BY e.created DESC, e.entry DESC LIMIT ?"
+        params.append(limit)
+
+        results = []
+        for row in self.conn.execute(sql, params):
+            *values, matched = row
+            entry = BundleEntry(*values)
+            entry.title = entry.title or ""
+            entry.matched_sections = matched.split("\n") if matched else []
+            results.append(entry)
+        return results
+
+    def facets(self) -> dict:
+        """絞り込み候補（年ごと・記入済みセクションごとの件数）を返す"""
+        return {
+            "year": dict(self.conn.execute(
+                "SELECT year, COUNT(*) FROM entries WHERE year IS NOT NULL GROUP BY year ORDER BY year DESC"
+            )),
+            "section": dict(self.conn.execute(
+                "SELECT name, COUNT(DISTINCT entry) FROM sections WHERE name != ?"
+                " GROUP BY name ORDER BY 2 DESC",
+                (METADATA_SECTION,),
+            )),
+        }
@@ -0,0 +1,389 @@
+"""
+論文テキストからのエンティティ抽出モジュール
+
+全文テキストを1回走査して、以下を抽出する。
+
+- 辞書照合（Aho-Corasick オートマトン）: 雑誌名、遺伝子シンボル
+- 正規表現（1本に結合してコンパイル済み）: DOI、HLAアレル、出版年、ペプチド配列候補
+
+ペプチド配列候補は、英単語・見出しを除き、前後に配列を示す文脈がある
+ものだけを採用する（大文字の見出しを配列と誤認しないため）。
+
+どちらもテキスト長に対して線形時間で動作するため、
+大きなSupplementary資料でも処理時間が急増しない。
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+# 雑誌名辞書（大文字小文字を区別して照合）
+JOURNAL_NAMES = [
+    "Nature",
+    "Nature Medicine",
+    "Nature Biotechnology",
+    "Nature Communications",
+    "Nature Immunology",
+    "Nature Methods",
+    "Nature Genetics",
+    "Nature Reviews Cancer",
+    "Nature Reviews Immunology",
+    "Science",
+    "Science Immunology",
+    "Science Translational Medicine",
+    "Science Advances",
+    "Cell",
+    "Cell Reports",
+    "Cell Systems",
+    "Cancer Cell",
+    "Immunity",
+    "Cancer Discovery",
+    "Cancer Research",
+    "Cancer Immunology Research",
+    "Clinical Cancer Research",
+    "Journal of Immunology",
+    "The Journal of Immunology",
+    "Journal of Experimental Medicine",
+    "Journal for ImmunoTherapy of Cancer",
+    "Journal of Proteome Research",
+    "Molecular & Cellular Proteomics",
+    "Proceedings of the National Academy of Sciences",
+    "PNAS",
+    "Nucleic Acids Research",
+    "Bioinformatics",
+    "Briefings in Bioinformatics",
+    "Genome Research",
+    "Genome Biology",
+    "Frontiers in Immunology",
+    "eLife",
+    "PLOS ONE",
+    "PLoS ONE",
+    "PLOS Computational Biology",
+    "PLoS Computational Biology",
+    "The Lancet",
+    "The New England Journal of Medicine",
+    "New England Journal of Medicine",
+    "Blood",
+]
+
+# 遺伝子シンボル辞書（がん免疫・抗原提示関連）
+GENE_SYMBOLS = [
+    "TP53", "KRAS", "NRAS", "HRAS", "BRAF", "EGFR", "ERBB2", "PIK3CA", "PTEN",
+    "IDH1", "IDH2", "ALK", "MYC", "APC", "CTNNB1", "NOTCH1", "ARID1A", "SMAD4",
+    "CDKN2A", "RB1", "STK11", "KEAP1", "FGFR3", "MET",
+    "B2M", "TAP1", "TAP2", "TAPBP", "ERAP1", "ERAP2", "NLRC5", "CIITA",
+    "PSMB8", "PSMB9", "CALR", "PDIA3",
+    "JAK1", "JAK2", "STAT1", "IRF1", "IFNG", "IFNGR1", "TNF", "IL2", "IL7",
+    "CD4", "CD8A", "CD8B", "CD3E", "CD274", "PDCD1", "PDCD1LG2", "CTLA4",
+    "LAG3", "HAVCR2", "TIGIT", "GZMB", "PRF1", "FOXP3",
+]
+
+# 一般的な略語と同じ綴りの遺伝子シンボル（APC = antigen-presenting cell など）。
+# 前後に遺伝子を示す文脈があるときだけ採用する
+AMBIGUOUS_GENE_SYMBOLS = frozenset({"APC", "MET"})
+_GENE_CONTEXT = re.compile(
+    r"(?i)\bgenes?\b|mutat|mutant|variant|alteration|amplifi|fusion|deletion|truncat"
+    r"|wild[- ]?type|knock(?:out|down)|\bexons?\b|codon|allele|somatic|germline"
+    r"|遺伝子|変異"
+)
+# 前後の文脈として見る文字数
+GENE_CONTEXT_CHARS = 60
+
+# ペプチド配列と同じ文字だけでできている英単語（見出し・頻出語）。ペプチド候補から除く
+_ENGLISH_WORDS = """
+ANALYSIS ANALYSES ANALYTICAL STATISTICAL STATISTICS MATERIALS MATERIAL REFERENCES
+PEPTIDES EPITOPES ANTIGENS ANTIGENIC PATIENTS CHARACTERISTICS CHARACTERISTIC
+STRATEGIES TREATMENT TREATMENTS DATASETS IDENTIFIED ASSESSMENT ASSESSMENTS
+SPECIFICITY SPECIFIC EFFICIENCY DIFFERENTIAL DIFFERENCES DIFFERENT SIGNIFICANT
+SIGNIFICANCE CLINICAL CLINICALLY CANDIDATE CANDIDATES THERAPIES THERAPEUTIC
+THERAPEUTICS ENRICHMENT VALIDATED SELECTED PREDICTED PREDICTIVE PRELIMINARY
+DETECTED ESTABLISHED INTERFERENCE METASTATIC LEARNING TRAINING ALIGNMENT
+ALIGNMENTS SPECTRAL ACCESSIBLE AVAILABILITY ARTICLES RESEARCH SCIENTIFIC
+SCIENCES MEDICINE GENETICS GENERATED DESCRIPTIVE TRANSCRIPT TRANSCRIPTS
+SPECIMENS CHEMICAL CHEMICALS REAGENTS PRINCIPAL PARTICIPANTS STANDARD STANDARDS
+CRITERIA INCLUDING FINANCIAL INTERESTS STATEMENT STATEMENTS CORRESPONDENCE
+CORRESPONDING ETHICAL FINDINGS EVIDENCE RELEVANCE LICENSED ATTRIBUTION
+CREATIVE COMMERCIAL PERMITTED PRINTED ACCEPTED RECEIVED REVISED PREPRINT
+EDITORIAL AFFILIATED DEPARTMENT INSTITUTE HEALTHCARE HEALTH SYSTEMATIC
+MECHANISMS MECHANISM PATHWAYS PATHWAY ASSAYS IMAGING STAINING STAINED
+PERIPHERAL MEMBRANE EXPANDED EXPANSION INFECTED INFECTIVE DISEASES DISEASE
+ASSESSED RESISTANCE RESISTANT SENSITIVE PERFECT ESSENTIAL DEFINITIVE
+PRESENTED SECRETED REMAINING STRAINS STREAMLINED PIPELINE
+PIPELINES SCREENING SCREENED VACCINES VACCINATED VACCINATION CHALLENGES
+FIGURES SPECIALIST INITIATED INITIAL INITIALLY INDICATED INVESTIGATED
+""".split()
+EXCLUDED_PEPTIDE_WORDS = frozenset(w for w in _ENGLISH_WORDS if re.fullmatch(r"[ACDEFGHIKLMNPQRSTVWY]+", w))
+
+# ペプチド候補として採用するには、前後にこれらの語（またはHLAアレル・他の配列）が必要
+_PEPTIDE_CONTEXT = re.compile(
+    r"(?i)peptide|epitope|ligand|neoantigen|antigen|\bHLA|\bMHC|\bpMHC|\bTCR|sequence|residue|\d+-?mers?\b"
+    r"|ペプチド|エピトープ|配列"
+)
+# 前後の文脈として見る文字数
+PEPTIDE_CONTEXT_CHARS = 150
+
+# DOI / HLAアレル / 出版年 / ペプチド候補 を1本の正規表現で照合する
+_ENTITY_PATTERN = re.compile(
+    r"(?P<doi>\b10\.\d{4,9}/[^\s\"<>]+)"
+    r"|(?P<hla>\bHLA-(?:DRB[1345]|DQA1|DQB1|DPA1|DPB1|DRA|[ABCEFG])"
+    r"\*?\d{1,3}(?::\d{2,3}){0,3}[NLSCAQ]?(?![\w:]))"
+    r"|(?P<year_ctx>(?i:©|\(c\)|copyright|published|received|accepted)"
+    r"[^\n]{0,40}?\b(?P<year>(?:19|20)\d{2})\b)"
+    r"|(?P<peptide>(?<![A-Za-z0-9])[ACDEFGHIKLMNPQRSTVWY]{8,25}(?![A-Za-z0-9]))"
+)
+
+# 雑誌名を探すのはヘッダ部分（おおよそ1ページ目）のみ
+JOURNAL_HEADER_CHARS = 4000
+
+# 雑誌名が書誌情報として現れている行の手がかり（DOI・©・巻号・年など）
+_JOURNAL_CONTEXT = re.compile(
+    r"(?i)\bdoi\b|10\.\d{4,9}/|©|\(c\)|copyright|published\s+in|\bvol(?:ume)?\.?\s*\d"
+    r"|\bissn\b|https?://|\b(?:19|20)\d{2}\b"
+)
+
+
+@dataclass
+class PaperEntities:
+    """論文テキストから抽出したエンティティ（出現順・重複なし）"""
+    dois: list = field(default_factory=list)
+    hla_alleles: list = field(default_factory=list)
+    peptides: list = field(default_factory=list)
+    genes: list = field(default_factory=list)
+    journals: list = field(default_factory=list)
+    years: list = field(default_factory=list)
+    journal: str = ""
+    year: str = ""
+
+
+class AhoCorasick:
+    """
+    複数パターン同時照合用の Aho-Corasick オートマトン。
+
+    Args:
+        patterns: {パターン文字列: 付随値} の辞書
+    """
+
+    def __init__(self, patterns: dict):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), value))
+
+        # 幅優先で失敗リンクを張る
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str):
+        """(開始位置, 終了位置, 付随値) を終了位置順に返す"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                end = i + 1
+                for length, value in out[node]:
+                    yield end - length, end, value
+
+
+_dictionary = None
+
+
+def _get_dictionary() -> AhoCorasick:
+    """雑誌名・遺伝子シンボル辞書のオートマトン（初回のみ構築）"""
+    global _dictionary
+    if _dictionary is None:
+        patterns = {name: ("journal", name) for name in JOURNAL_NAMES}
+        patterns.update({symbol: ("gene", symbol) for symbol in GENE_SYMBOLS})
+        _dictionary = AhoCorasick(patterns)
+    return _dictionary
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not (before.isalnum() or after.isalnum())
+
+
+def _leftmost_longest(matches: list) -> list:
+    """重なる照合結果から、左端優先・最長一致のものだけを残す"""
+    matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+    selected = []
+    last_end = -1
+    for m in matches:
+        if m[0] >= last_end:
+            selected.append(m)
+            last_end = m[1]
+    return selected
+
+
+def _normalize_hla(allele: str) -> str:
+    """HLA-A02:01 → HLA-A*02:01 のように表記を揃える"""
+    if "*" not in allele and ":" in allele:
+        gene, _, rest = allele.partition("-")
+        locus = re.match(r"(DRB[1345]|DQA1|DQB1|DPA1|DPB1|DRA|[ABCEFG])", rest).group(1)
+        return f"{gene}-{locus}*{rest[len(locus):]}"
+    return allele
+
+
+def _line_at(text: str, start: int, end: int) -> str:
+    line_start = text.rfind("\n", 0, start) + 1
+    line_end = text.find("\n", end)
+    return text[line_start:line_end if line_end >= 0 else len(text)]
+
+
+def _is_heading_line(line: str) -> bool:
+    """大文字の単語だけからなる行（"MATERIALS AND METHODS" など）"""
+    words = line.split()
+    return len(words) >= 2 and all(w.isalpha() and w.isupper() for w in words) and any(
+        not _PEPTIDE_WORD.fullmatch(w) for w in words
+    )
+
+
+_PEPTIDE_WORD = re.compile(r"(?<![A-Za-z0-9])[ACDEFGHIKLMNPQRSTVWY]{8,25}(?![A-Za-z0-9])")
+
+
+def _is_peptide(text: str, start: int, sequence: str) -> bool:
+    """
+    大文字の単語がペプチド配列らしいかを判定する。
+
+    英単語・見出しを除いたうえで、前後に配列を示す文脈
+    （peptide / epitope / HLA などの語、HLAアレル、他の配列候補）があるものだけ採用する。
+    """
+    if sequence in EXCLUDED_PEPTIDE_WORDS:
+        return False
+    end = start + len(sequence)
+    if _is_heading_line(_line_at(text, start, end)):
+        return False
+    before = text[max(0, start - PEPTIDE_CONTEXT_CHARS):start]
+    after = text[end:end + PEPTIDE_CONTEXT_CHARS]
+    if _PEPTIDE_CONTEXT.search(before) or _PEPTIDE_CONTEXT.search(after):
+        return True
+    # 表の列のように配列が並んでいる
+    return any(
+        w not in EXCLUDED_PEPTIDE_WORDS
+        for w in _PEPTIDE_WORD.findall(before + "\n" + after)
+    )
+
+
+def _is_gene(text: str, start: int, end: int, symbol: str) -> bool:
+    """遺伝子シンボルの照合結果が遺伝子を指しているか（紛らわしいシンボルのみ文脈で判定）"""
+    if symbol not in AMBIGUOUS_GENE_SYMBOLS:
+        return True
+    before = text[max(0, start - GENE_CONTEXT_CHARS):start]
+    after = text[end:end + GENE_CONTEXT_CHARS]
+    return bool(_GENE_CONTEXT.search(before) or _GENE_CONTEXT.search(after))
+
+
+def _is_journal_context(text: str, start: int, end: int, name: str) -> bool:
+    """
+    雑誌名の照合結果が書誌情報として現れているか。
+
+    "Blood samples were..." のような本文中の一般語を雑誌名としないため、
+    同じ行に DOI・©・巻号・年などがある場合と、複数語の雑誌名が
+    1行だけで書かれている場合（ランニングヘッダ）だけを採用する。
+    """
+    line = _line_at(text, start, end)
+    if _JOURNAL_CONTEXT.search(line):
+        return True
+    return " " in name and line.strip() == name
+
+
+def find_journal(text: str) -> str:
+    """
+    書誌情報のテキスト（PDFの subject メタデータなど）から雑誌名を探す。
+
+    文脈の判定はせず、辞書に一致した最長の雑誌名を返す（なければ空文字）。
+    """
+    names = [
+        value[1] for start, end, value in _get_dictionary().iter_matches(text)
+        if value[0] == "journal" and _is_word_boundary(text, start, end)
+    ]
+    return max(names, key=len) if names else ""
+
+
+def _unique(items) -> list:
+    return list(dict.fromkeys(items))
+
+
+def extract_entities(text: str) -> PaperEntities:
+    """
+    論文テキストからエンティティを抽出する。
+
+    Args:
+        text: 論文の全文テキスト
+
+    Returns:
+        PaperEntities: 抽出結果
+    """
+    entities = PaperEntities()
+
+    # 辞書照合（雑誌名・遺伝子シンボル）
+    matches = [
+        m for m in _get_dictionary().iter_matches(text)
+        if _is_word_boundary(text, m[0], m[1])
+    ]
+    journal_hits = []
+    genes = []
+    for start, end, (kind, name) in _leftmost_longest(matches):
+        if kind == "journal":
+            if _is_journal_context(text, start, end, name):
+                journal_hits.append((start, name))
+        elif _is_gene(text, start, end, name):
+            genes.append(name)
+    entities.genes = _unique(genes)
+    entities.journals = _unique(name for _, name in journal_hits)
+
+    # 正規表現照合（DOI・HLAアレル・出版年・ペプチド候補）
+    dois, hla, years, peptides = [], [], [], []
+    for m in _ENTITY_PATTERN.finditer(text):
+        kind = m.lastgroup
+        if kind == "doi":
+            dois.append(m.group("doi").rstrip(".,;)]"))
+        elif kind == "hla":
+            hla.append(_normalize_hla(m.group("hla")))
+        elif kind == "year_ctx":
+            years.append(m.group("year"))
+        elif kind == "peptide":
+            peptides.append((m.start(), m.group("peptide")))
+    entities.dois = _unique(dois)
+    entities.hla_alleles = _unique(hla)
+    entities.years = _unique(years)
+    entities.peptides = _unique(seq for start, seq in peptides if _is_peptide(text, start, seq))
+
+    # ヘッダ部分の雑誌名のうち、最長のもの（同じ長さなら先に出現したもの）
+    header_journals = [name for start, name in journal_hits if start < JOURNAL_HEADER_CHARS]
+    if header_journals:
+        entities.journal = max(header_journals, key=len)
+
+    # 出版年: 「Published」「©」などに続く年のうち最も多いもの
+    if years:
+        entities.year = Counter(years).most_common(1)[0][0]
+
+    return entities
@@ -20,6 +20,9 @@ except ImportError:
         print("  pip install pymupdf")
         sys.exit(1)
 
+from entity_extractor import PaperEntities, extract_entities, find_journal
+from profiler import span, count
+
 
 @dataclass
 class PaperMetadata:
@@ -33,86 +36,251 @@ class PaperMetadata:
     filename: str = ""
 
 
+class PageTexts:
+    """
+    PDFのページテキストを必要になったときに読み込む。
+
+    読み込んだページはキャッシュする。close() 後に再びアクセスすると
+    PDFを開き直すので、スキャン後に全文が必要になった場合にも使える。
+
+    Args:
+        pdf_path: PDFファイルのパス
+    """
+
+    def __init__(self, pdf_path: Path):
+        self.path = Path(pdf_path)
+        self._doc = None
+        self._cache = {}
+        self._count = None
+
+    @property
+    def doc(self):
+        """開いている fitz.Document（未オープンなら開く）"""
+        if self._doc is None:
+            with span("fitz.open"):
+                self._doc = fitz.open(str(self.path))
+        return self._doc
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = len(self.doc)
+        return self._count
+
+    @property
+    def loaded(self) -> int:
+        """読み込み済みのページ数"""
+        return len(self._cache)
+
+    def __getitem__(self, page_num: int) -> str:
+        if page_num < 0:
+            page_num += len(self)
+        if not 0 <= page_num < len(self):
+            raise IndexError(f"ページ番号が範囲外です: {page_num}")
+        text = self._cache.get(page_num)
+        if text is None:
+            with span("page.get_text"):
+                text = self.doc[page_num].get_text("text")
+            self._cache[page_num] = text
+        return text
+
+    def close(self):
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+
 @dataclass
 class ExtractedPaper:
     """抽出された論文データ"""
     metadata: PaperMetadata = field(default_factory=PaperMetadata)
     full_text: str = ""
     sections: dict = field(default_factory=dict)
+    entities: PaperEntities = field(default_factory=PaperEntities)
+    abstract: str = ""
+    pages: PageTexts | None = None  # ページテキスト（未読のページはアクセス時に読み込む）
+    pages_read: int = 0  # 抽出時に読んだページ数（scan_pdf では先頭の数ページのみ）
+
+    def page_text(self, page_num: int) -> str:
+        """ページのテキストを返す（まだ読んでいないページはここで読み込む）"""
+        if self.pages is None:
+            raise ValueError("ページ情報がありません")
+        return self.pages[page_num]
 
 
-def extract_text_from_pdf(pdf_path: str) -> ExtractedPaper:
+def _check_pdf_path(pdf_path: str) -> Path:
+    path = Path(pdf_path)
+    if not path.exists():
+        raise FileNotFoundError(f"ファイルが見つかりません: {pdf_path}")
+    if path.suffix.lower() != ".pdf":
+        raise ValueError(f"PDFファイルではありません: {pdf_path}")
+    return path
+
+
+def extract_text_from_pdf(pdf_path: str, pages: PageTexts | None = None) -> ExtractedPaper:
     """
     PDFファイルからテキストとメタデータを抽出する。
 
     Args:
         pdf_path: PDFファイルのパス
+        pages: scan_pdf で作成済みのページ（読み込み済みのページは読み直さない）
 
     Returns:
         ExtractedPaper: 抽出された論文データ
     """
-    path = Path(pdf_path)
-    if not path.exists():
-        raise FileNotFoundError(f"ファイルが見つかりません: {pdf_path}")
-    if path.suffix.lower() != ".pdf":
-        raise ValueError(f"PDFファイルではありません: {pdf_path}")
-
-    doc = fitz.open(str(path))
-    paper = ExtractedPaper()
-
-    # メタデータ抽出
-    paper.metadata = _extract_metadata(doc, path)
+    path = _check_pdf_path(pdf_path)
+    pages = pages or PageTexts(path)
+    doc = pages.doc
+    paper = ExtractedPaper(pages=pages)
 
     # 全文テキスト抽出
     pages_text = []
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        text = page.get_text("text")
+    for page_num in range(len(pages)):
+        text = pages[page_num]
         if text.strip():
             pages_text.append(text)
+    paper.pages_read = len(pages)
+    count("pages", len(pages))
 
     paper.full_text = "\n\n".join(pages_text)
+    count("chars", len(paper.full_text))
+
+    # エンティティ抽出（DOI・HLAアレル・ペプチド・遺伝子・雑誌名）
+    with span("entities"):
+        paper.entities = extract_entities(paper.full_text)
+
+    # メタデータ抽出（抽出済みのページテキストとエンティティを利用）
+    with span("metadata"):
+        paper.metadata = _extract_metadata(doc, path, pages_text, paper.entities)
 
     # セクション分割を試みる
-    paper.sections = _split_sections(paper.full_text)
+    with span("split_sections"):
+        paper.sections = _split_sections(paper.full_text)
+    count("sections", len(paper.sections))
+    paper.abstract = _find_abstract(paper.full_text)[0]
 
-    doc.close()
+    pages.close()
     return paper
 
 
-def _extract_metadata(doc, path: Path) -> PaperMetadata:
-    """PDFメタデータとテキストからメタデータを抽出"""
+def scan_pdf(pdf_path: str, max_pages: int = 3) -> ExtractedPaper:
+    """
+    トリアージ用の簡易抽出。PDF組み込みメタデータと先頭の数ページだけを読む。
+
+    要旨（Abstract）の終わりが見つかった時点で以降のページは読まない。
+    本文のセクション分割も行わない。全文が必要になったら
+    extract_text_from_pdf(pdf_path, pages=paper.pages) で、読み込み済みの
+    ページを再利用して抽出できる。
+
+    Args:
+        pdf_path: PDFファイルのパス
+        max_pages: 読む最大ページ数
+
+    Returns:
+        ExtractedPaper: full_text は読んだページのみ。abstract・metadata を設定済み
+    """
+    path = _check_pdf_path(pdf_path)
+    pages = PageTexts(path)
+    doc = pages.doc
+    paper = ExtractedPaper(pages=pages)
+
+    pages_text = []
+    abstract = ""
+    for page_num in range(min(max_pages, len(pages))):
+        text = pages[page_num]
+        if text.strip():
+            pages_text.append(text)
+        abstract, complete = _find_abstract("\n\n".join(pages_text))
+        if complete:
+            break
+    paper.pages_read = pages.loaded
+    count("pages", paper.pages_read)
+
+    paper.full_text = "\n\n".join(pages_text)
+    paper.abstract = abstract or _first_paragraph(paper.full_text)
+
+    with span("entities"):
+        paper.entities = extract_entities(paper.full_text)
+    with span("metadata"):
+        paper.metadata = _extract_metadata(doc, path, pages_text, paper.entities)
+
+    pages.close()
+    return paper
+
+
+# 要旨の見出し（見出し行の後ろに本文が続く形式にも対応）
+_ABSTRACT_HEADING = re.compile(r"(?im)^[ \t]*(?:abstract|summary|要旨|要約|抄録)\b[ \t]*[:.：]?[ \t]*")
+# 要旨の次に来る見出し（単独の行のみ。構造化要旨の「Background: ...」では止めない）
+_ABSTRACT_END = re.compile(
+    r"(?im)^[ \t]*(?:\d+\.?[ \t]*)?"
+    r"(?:introduction|background|key[ \t]*words?|significance|"
+    r"はじめに|序論|緒言|背景|キーワード)[ \t]*$"
+)
+MAX_ABSTRACT_CHARS = 3000
+MIN_PARAGRAPH_CHARS = 400
+
+
+def _find_abstract(text: str) -> tuple:
+    """
+    要旨を探す。
+
+    Returns:
+        (要旨のテキスト, 終わりまで見つかったか)
+    """
+    heading = _ABSTRACT_HEADING.search(text)
+    if not heading:
+        return "", False
+    body = text[heading.end():]
+    # 要旨の本文より前にある見出し（構造化要旨の小見出しなど）では止めない
+    end = next((m for m in _ABSTRACT_END.finditer(body) if body[:m.start()].strip()), None)
+    if end:
+        body = body[:end.start()]
+    abstract = " ".join(body.split())[:MAX_ABSTRACT_CHARS]
+    return abstract, end is not None or len(body) > MAX_ABSTRACT_CHARS
+
+
+def _first_paragraph(text: str) -> str:
+    """要旨の見出しがない論文用: 最初の十分に長い段落を要旨とみなす"""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if len(paragraph) >= MIN_PARAGRAPH_CHARS:
+            return paragraph[:MAX_ABSTRACT_CHARS]
+    return ""
+
+
+def _extract_metadata(doc, path: Path, pages_text: list,
+                      entities: PaperEntities) -> PaperMetadata:
+    """PDFメタデータ・ページテキスト・エンティティからメタデータを抽出"""
     meta = PaperMetadata()
     meta.filename = path.name
     meta.pages = len(doc)
 
     # PDF組み込みメタデータ
-    pdf_meta = doc.metadata
-    if pdf_meta:
-        meta.title = pdf_meta.get("title", "") or ""
-        meta.authors = pdf_meta.get("author", "") or ""
+    pdf_meta = doc.metadata or {}
+    meta.title = pdf_meta.get("title", "") or ""
+    meta.authors = pdf_meta.get("author", "") or ""
+    # subject / keywords には雑誌名や DOI が入っていることがある
+    embedded = "\n".join(pdf_meta.get(key) or "" for key in ("subject", "keywords"))
 
     # タイトルが空の場合、最初のページから推定
-    if not meta.title.strip():
-        first_page = doc[0].get_text("text")
-        lines = [l.strip() for l in first_page.split("\n") if l.strip()]
+    if not meta.title.strip() and pages_text:
+        lines = [l.strip() for l in pages_text[0].split("\n") if l.strip()]
         if lines:
             # 最初の非空行をタイトル候補とする
             meta.title = lines[0]
 
-    # DOI抽出（テキスト全体から検索）
-    full_text = ""
-    for page_num in range(min(3, len(doc))):  # 最初の3ページから検索
-        full_text += doc[page_num].get_text("text")
+    meta.journal = find_journal(embedded) or entities.journal
 
-    doi_match = re.search(r'(10\.\d{4,}/[^\s]+)', full_text)
-    if doi_match:
-        meta.doi = doi_match.group(1).rstrip(".,;)")
+    # DOI: 本文中で最初に出現したもの（なければ組み込みメタデータから）
+    dois = entities.dois or extract_entities(embedded).dois
+    if dois:
+        meta.doi = dois[0]
 
-    # 年の抽出
-    year_match = re.search(r'(20[0-2]\d|19\d{2})', full_text)
-    if year_match:
-        meta.year = year_match.group(1)
+    # 年: 「Published」「©」などに続く年。見つからなければ最初の3ページの最初の年
+    meta.year = entities.year
+    if not meta.year:
+        year_match = re.search(r'(20[0-2]\d|19\d{2})', "".join(pages_text[:3]))
+        if year_match:
+            meta.year = year_match.group(1)
 
     return meta
 
@@ -197,6 +365,21 @@ def paper_to_text(paper: ExtractedPaper) -> str:
     lines.append(f"  ファイル: {meta.filename}")
     lines.append("")
 
+    # 検出エンティティ
+    ent = paper.entities
+    entity_rows = [
+        ("HLAアレル", ent.hla_alleles),
+        ("ペプチド候補", ent.peptides),
+        ("遺伝子", ent.genes),
+        ("DOI", ent.dois),
+    ]
+    if any(values for _, values in entity_rows):
+        lines.append("【検出エンティティ】")
+        for label, values in entity_rows:
+            if values:
+                lines.append(f"  {label}: {', '.join(values)}")
+        lines.append("")
+
     # セクション構成
     if paper.sections:
         lines.append("【検出されたセクション】")
@@ -0,0 +1,188 @@
+"""
+処理ステージ計測モジュール
+
+論文処理パイプラインの各ステージ（PDFオープン、ページ抽出、セクション分割、
+ファイル書き出しなど）のwall時間・CPU時間とカウンタ（ページ数、文字数、
+書き込みバイト数）を記録する。
+
+無効時は span() が共有のダミーオブジェクトを返すだけなので、
+計測コードを残したままでもオーバーヘッドはほぼゼロ。
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+_enabled = False
+_runs = []
+_current = None
+
+
+@dataclass
+class StageStats:
+    """1ステージ分の計測値"""
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+
+
+@dataclass
+class ProfileRun:
+    """1回の処理（PDF 1本）の計測結果"""
+    label: str = ""
+    stages: dict = field(default_factory=dict)
+    counters: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "stages": {
+                name: {"calls": s.calls, "wall": s.wall, "cpu": s.cpu}
+                for name, s in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+class _NullSpan:
+    """計測無効時に返すダミーのコンテキストマネージャ"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """wall時間とCPU時間を計測するコンテキストマネージャ"""
+
+    __slots__ = ("name", "wall_start", "cpu_start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        run = _current_run()
+        stats = run.stages.get(self.name)
+        if stats is None:
+            stats = run.stages[self.name] = StageStats()
+        stats.calls += 1
+        stats.wall += wall
+        stats.cpu += cpu
+        return False
+
+
+def enable():
+    """計測を有効にする"""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    """計測が有効かどうか"""
+    return _enabled
+
+
+def _current_run() -> ProfileRun:
+    global _current
+    if _current is None:
+        _current = ProfileRun(label="(default)")
+        _runs.append(_current)
+    return _current
+
+
+def start_run(label: str):
+    """新しい計測単位（通常はPDF 1本）を開始する"""
+    global _current
+    if not _enabled:
+        return
+    _current = ProfileRun(label=label)
+    _runs.append(_current)
+
+
+def end_run():
+    """現在の計測単位を終了する"""
+    global _current
+    _current = None
+
+
+def span(name: str):
+    """
+    ステージの計測範囲を返す。
+
+    使い方:
+        with span("fitz.open"):
+            doc = fitz.open(path)
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def count(name: str, value: int = 1):
+    """カウンタを加算する（ページ数・文字数・バイト数など）"""
+    if not _enabled:
+        return
+    counters = _current_run().counters
+    counters[name] = counters.get(name, 0) + value
+
+
+def aggregate() -> ProfileRun:
+    """全計測単位のステージ・カウンタを合算する"""
+    total = ProfileRun(label="total")
+    for run in _runs:
+        for name, s in run.stages.items():
+            t = total.stages.get(name)
+            if t is None:
+                t = total.stages[name] = StageStats()
+            t.calls += s.calls
+            t.wall += s.wall
+            t.cpu += s.cpu
+        for name, value in run.counters.items():
+            total.counters[name] = total.counters.get(name, 0) + value
+    return total
+
+
+def report() -> dict:
+    """JSON出力用の計測レポートを返す"""
+    return {
+        "runs": [run.to_dict() for run in _runs],
+        "aggregate": aggregate().to_dict(),
+    }
+
+
+def write_report(output_path: Path):
+    """計測レポートをJSONファイルに保存"""
+    text = json.dumps(report(), ensure_ascii=False, indent=2)
+    output_path.write_text(text, encoding="utf-8")
+
+
+def format_table() -> str:
+    """全計測単位を合算したステージ別の集計表を返す"""
+    total = aggregate()
+    n_runs = max(len(_runs), 1)
+    lines = []
+    lines.append(f"{'ステージ':<24} {'呼出':>7} {'wall(s)':>10} {'cpu(s)':>10} {'平均wall(ms)':>13}")
+    lines.append("-" * 68)
+    ordered = sorted(total.stages.items(), key=lambda kv: kv[1].wall, reverse=True)
+    for name, s in ordered:
+        mean_ms = s.wall / n_runs * 1000
+        lines.append(f"{name:<24} {s.calls:>7} {s.wall:>10.4f} {s.cpu:>10.4f} {mean_ms:>13.2f}")
+    if total.counters:
+        lines.append("")
+        for name, value in sorted(total.counters.items()):
+            lines.append(f"  {name}: {value:,}")
+    lines.append(f"\n  計測対象: {len(_runs)}件")
+    return "\n".join(lines)
@@ -0,0 +1,290 @@
+"""
+関連論文検索モジュール
+
+summaries/ に蓄積された論文から、新しい論文に近いものを TF-IDF の
+コサイン類似度で検索する。
+
+- 文書ベクトルは転置インデックス（単語 → {文書: 重み} の posting）として
+  SQLite に保存し、開いたときに一度だけメモリに読み込む。内積はクエリ中の
+  単語の posting だけを辿って求めるので、コーパス全体は走査しない。
+- 論文の追加は差分更新で、SQLite にはその論文の行だけを書き込む。
+  文書ベクトルのノルムは追加時点の IDF で計算し、コーパスが前回の
+  再計算時の2倍になったら全体を再計算する。
+"""
+
+import heapq
+import math
+import re
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+# 1文書あたりに保持する単語数の上限（出現回数の多い順）
+MAX_TERMS_PER_DOC = 400
+
+# 類似度計算に使わないセクション（見出しの先頭で判定）
+EXCLUDED_SECTIONS = ("reference", "参考文献", "引用文献", "acknowledgement", "謝辞")
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9\-]{2,}")
+
+STOPWORDS = frozenset("""
+the and for with that this from were was are have has had been not but all
+any can its into than then there these they their which while where when who
+whom also may might such each other more most some only over under between
+both after before using used use our ours out via per within without however
+therefore thus although fig figure figures table tables data result results
+study studies shown show shows based respectively et al
+""".split())
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    summary TEXT,
+    norm REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc INTEGER NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (term_id, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings(doc);
+"""
+
+# 対数TF重み 1 + log(tf) の早見表（小さい出現回数が大半を占めるため）
+_TF_WEIGHTS = [0.0] + [1.0 + math.log(c) for c in range(1, 256)]
+
+
+@dataclass
+class RelatedPaper:
+    """関連論文の検索結果"""
+    doc_id: str
+    title: str = ""
+    summary: str = ""
+    score: float = 0.0
+
+
+@dataclass
+class _Document:
+    doc_id: str
+    title: str = ""
+    summary: str = ""
+    norm: float = 0.0
+
+
+def tokenize(text: str) -> list:
+    """英単語を小文字化して抽出（ストップワードは除外）"""
+    return [t for t in _TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def sections_to_term_counts(sections: dict) -> dict:
+    """ExtractedPaper.sections から単語の出現回数を数える（参考文献などは除外）"""
+    counts = Counter()
+    for name, text in sections.items():
+        if name.strip().lower().startswith(EXCLUDED_SECTIONS):
+            continue
+        counts.update(tokenize(text))
+    return dict(counts.most_common(MAX_TERMS_PER_DOC))
+
+
+class SimilarityIndex:
+    """
+    差分更新可能な TF-IDF 類似度インデックス（SQLite に保存）。
+
+    開いたときに posting をすべてメモリに読み込み、クエリはメモリ上で計算する。
+    論文の追加・削除はメモリ上の posting を更新したうえで、その論文の行だけを
+    SQLite に書き込む。プロセス内で1つのインスタンスを使い回すこと。
+
+    SQLite の接続はスレッドをまたいで使えないため、作成したスレッドで使うこと。
+
+    Args:
+        path: インデックスを保存する SQLite ファイル
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'refreshed_at'").fetchone()
+        self._refreshed_at = int(row[0]) if row else 0
+        self._load()
+
+    def _load(self):
+        # {文書の行ID: _Document}, {文書ID: 行ID}, {単語: 単語ID}, {単語ID: {行ID: TF重み}}
+        self.docs = {
+            doc: _Document(doc_id, title or "", summary or "", norm)
+            for doc, doc_id, title, summary, norm in self.conn.execute(
+                "SELECT id, doc_id, title, summary, norm FROM docs"
+            )
+        }
+        self._doc_ids = {d.doc_id: doc for doc, d in self.docs.items()}
+        self.terms = dict(self.conn.execute("SELECT term, id FROM terms"))
+        postings = {}
+        for term_id, doc, weight in self.conn.execute("SELECT term_id, doc, weight FROM postings"):
+            posting = postings.get(term_id)
+            if posting is None:
+                postings[term_id] = {doc: weight}
+            else:
+                posting[doc] = weight
+        self.postings = postings
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _idf(self, term_id: int | None) -> float:
+        # 平滑化IDF（sklearn の smooth_idf と同じ形）。文書頻度は posting の長さ
+        posting = self.postings.get(term_id)
+        df = len(posting) if posting else 0
+        return math.log((1 + len(self.docs)) / (1 + df)) + 1.0
+
+    @staticmethod
+    def _tf_weight(count: int) -> float:
+        if count < len(_TF_WEIGHTS):
+            return _TF_WEIGHTS[count]
+        return 1.0 + math.log(count)
+
+    def _norm(self, tf: dict) -> float:
+        terms = self.terms
+        return math.sqrt(sum(
+            (self._tf_weight(c) * self._idf(terms.get(t))) ** 2 for t, c in tf.items()
+        ))
+
+    def save(self):
+        """変更を確定する（書き込まれるのは追加・削除した文書の行だけ）"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('refreshed_at', ?)", (self._refreshed_at,)
+        )
+        self.conn.commit()
+
+    def remove(self, doc_id: str):
+        """文書をインデックスから削除する"""
+        doc = self._doc_ids.pop(doc_id, None)
+        if doc is None:
+            return
+        del self.docs[doc]
+        for (term_id,) in self.conn.execute("SELECT term_id FROM postings WHERE doc = ?", (doc,)):
+            posting = self.postings.get(term_id)
+            if posting is not None:
+                posting.pop(doc, None)
+                if not posting:
+                    del self.postings[term_id]
+        self.conn.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+        self.conn.execute("DELETE FROM docs WHERE id = ?", (doc,))
+
+    def add(self, doc_id: str, sections: dict, title: str = "", summary: str = ""):
+        """
+        論文を追加する（同じ doc_id があれば置き換え）。
+
+        Args:
+            doc_id: 文書ID（PDFファイル名など）
+            sections: ExtractedPaper.sections
+            title: 論文タイトル
+            summary: 要約テンプレートのファイル名
+        """
+        self.remove(doc_id)
+        tf = sections_to_term_counts(sections)
+
+        new_terms = [t for t in tf if t not in self.terms]
+        for term in new_terms:
+            cur = self.conn.execute("INSERT INTO terms (term) VALUES (?)", (term,))
+            self.terms[term] = cur.lastrowid
+
+        cur = self.conn.execute(
+            "INSERT INTO docs (doc_id, title, summary, norm) VALUES (?, ?, ?, 0)",
+            (doc_id, title, summary),
+        )
+        doc = cur.lastrowid
+        self.docs[doc] = _Document(doc_id, title, summary)
+        self._doc_ids[doc_id] = doc
+
+        rows = [(self.terms[t], doc, self._tf_weight(c)) for t, c in tf.items()]
+        for term_id, _, weight in rows:
+            posting = self.postings.get(term_id)
+            if posting is None:
+                self.postings[term_id] = {doc: weight}
+            else:
+                posting[doc] = weight
+        self.conn.executemany("INSERT INTO postings (term_id, doc, weight) VALUES (?, ?, ?)", rows)
+
+        # 追加時点の IDF でノルムを計算（この文書自身を数えた文書頻度）
+        norm = self._norm(tf)
+        self.docs[doc].norm = norm
+        self.conn.execute("UPDATE docs SET norm = ? WHERE id = ?", (norm, doc))
+
+        if len(self.docs) >= 2 * max(self._refreshed_at, 1):
+            self.refresh()
+
+    def refresh(self):
+        """現在の IDF で全文書のノルムを再計算する"""
+        totals = dict.fromkeys(self.docs, 0.0)
+        for term_id, posting in self.postings.items():
+            idf = self._idf(term_id)
+            for doc, weight in posting.items():
+                w = weight * idf
+                totals[doc] += w * w
+        for doc, total in totals.items():
+            self.docs[doc].norm = math.sqrt(total)
+        self.conn.executemany(
+            "UPDATE docs SET norm = ? WHERE id = ?",
+            ((self.docs[doc].norm, doc) for doc in totals),
+        )
+        self._refreshed_at = len(self.docs)
+
+    def query(self, sections: dict, k: int = 5, exclude: str | None = None) -> list:
+        """
+        論文に類似した文書を上位 k 件返す。
+
+        Args:
+            sections: ExtractedPaper.sections
+            k: 返す件数
+            exclude: 結果から除外する文書ID（自分自身など）
+
+        Returns:
+            RelatedPaper のリスト（類似度の降順）
+        """
+        tf = sections_to_term_counts(sections)
+        if not tf or not self.docs:
+            return []
+
+        query_norm = self._norm(tf)
+        if query_norm == 0:
+            return []
+
+        # 転置インデックスで疎ベクトル同士の内積を累積
+        # （クエリ側の重みに文書側の IDF も掛けておく）
+        scores = {}
+        for term, c in tf.items():
+            term_id = self.terms.get(term)
+            posting = self.postings.get(term_id)
+            if not posting:
+                continue
+            idf = self._idf(term_id)
+            w = self._tf_weight(c) * idf * idf
+            for doc, dw in posting.items():
+                scores[doc] = scores.get(doc, 0.0) + w * dw
+        scores.pop(self._doc_ids.get(exclude), None)
+
+        docs = self.docs
+        top = heapq.nlargest(
+            k, ((doc, dot) for doc, dot in scores.items() if docs[doc].norm > 0),
+            key=lambda kv: kv[1] / docs[kv[0]].norm,
+        )
+        results = []
+        for doc, dot in top:
+            d = docs[doc]
+            score = dot / (d.norm * query_norm)
+            results.append(RelatedPaper(d.doc_id, d.title, d.summary, round(score, 4)))
+        return results
@@ -12,6 +12,19 @@
   3. 空テンプレートだけ生成:
      python scripts/summarize_paper.py --template
 
+  4. ステージ別の処理時間を計測:
+     python scripts/summarize_paper.py papers/*.pdf --profile
+
+  5. papers/ を監視して新しいPDFを自動処理:
+     python scripts/summarize_paper.py --watch
+
+  6. 要約バンドルを更新・検索:
+     python scripts/summarize_paper.py --bundle
+     python scripts/summarize_paper.py --search 抗原提示 --section 手法
+
+  7. 大量のPDFを簡易スキャンしてトリアージ用CSVを作成:
+     python scripts/summarize_paper.py --scan
+
 ワークフロー:
   Step 1: このスクリプトでPDFからテキスト抽出 & プロンプト生成
   Step 2: Claude Projects に PDF をアップロード
@@ -20,15 +33,23 @@
 """
 
 import argparse
+import csv
 import re
 import sys
 from datetime import date
 from pathlib import Path
 
-# スクリプトディレクトリをパスに追加
+# スクリプトディレクトリとプロジェクトルート(peptide_mw)をパスに追加
 sys.path.insert(0, str(Path(__file__).parent))
-
-from pdf_extractor import extract_text_from_pdf, paper_to_text, ExtractedPaper
+sys.path.insert(1, str(Path(__file__).parent.parent))
+
+import profiler
+from bundle import SummaryBundle
+from profiler import span, count
+from peptide_mw import calculate_mw
+from pdf_extractor import extract_text_from_pdf, scan_pdf, paper_to_text, ExtractedPaper
+from similarity import SimilarityIndex
+from watcher import PaperWatcher, scan_pdfs
 from templates import (
     SummaryInfo,
     generate_summary_template,
@@ -40,6 +61,14 @@ from templates import (
 PROJECT_ROOT = Path(__file__).parent.parent
 SUMMARIES_DIR = PROJECT_ROOT / "summaries"
 PAPERS_DIR = PROJECT_ROOT / "papers"
+PROFILE_REPORT_PATH = SUMMARIES_DIR / "profile_report.json"
+WATCH_STATE_PATH = SUMMARIES_DIR / ".watch_state.json"
+SIMILARITY_INDEX_PATH = SUMMARIES_DIR / ".similarity_index.sqlite"
+BUNDLE_PATH = SUMMARIES_DIR / "bundle.sqlite"
+TRIAGE_CSV_PATH = SUMMARIES_DIR / "triage.csv"
+TRIAGE_COLUMNS = ["file", "title", "authors", "year", "doi", "journal",
+                  "pages", "pages_read", "abstract", "error"]
+RELATED_PAPERS = 5
 
 
 def make_summary_filename(paper: ExtractedPaper) -> str:
@@ -53,10 +82,19 @@ def make_summary_filename(paper: ExtractedPaper) -> str:
     return f"{today}_{safe_title}.md"
 
 
+def write_output(output_path: Path, text: str):
+    """テキストをUTF-8で書き出し、書き込みバイト数を記録する"""
+    data = text.encode("utf-8")
+    output_path.write_bytes(data)
+    count("bytes_written", len(data))
+    count("files_written")
+
+
 def extract_and_show(pdf_path: str) -> ExtractedPaper:
     """PDFを抽出して結果を表示"""
     print(f"📄 PDFを読み込み中: {pdf_path}")
-    paper = extract_text_from_pdf(pdf_path)
+    with span("extract_text_from_pdf"):
+        paper = extract_text_from_pdf(pdf_path)
 
     meta = paper.metadata
     print(f"\n{'='*50}")
@@ -64,6 +102,7 @@ def extract_and_show(pdf_path: str) -> ExtractedPaper:
     print(f"{'='*50}")
     print(f"  タイトル:   {meta.title or '(不明)'}")
     print(f"  著者:       {meta.authors or '(不明)'}")
+    print(f"  雑誌:       {meta.journal or '(不明)'}")
     print(f"  年:         {meta.year or '(不明)'}")
     print(f"  DOI:        {meta.doi or '(不明)'}")
     print(f"  ページ数:   {meta.pages}")
@@ -74,26 +113,74 @@ def extract_and_show(pdf_path: str) -> ExtractedPaper:
         for name in paper.sections:
             print(f"    - {name}")
 
+    ent = paper.entities
+    if ent.hla_alleles:
+        print(f"\n  HLAアレル: {', '.join(ent.hla_alleles)}")
+    if ent.genes:
+        print(f"  遺伝子:    {', '.join(ent.genes)}")
+    if ent.peptides:
+        print("\n  ペプチド候補:")
+        for pep in ent.peptides:
+            print(f"    - {pep} ({len(pep)} aa, {calculate_mw(pep):.5f} Da)")
+
     return paper
 
 
 def save_extracted_text(paper: ExtractedPaper, output_path: Path):
     """抽出テキストをファイルに保存"""
-    text = paper_to_text(paper)
-    output_path.write_text(text, encoding="utf-8")
+    with span("paper_to_text"):
+        text = paper_to_text(paper)
+    with span("write.extracted"):
+        write_output(output_path, text)
     print(f"\n✅ 抽出テキスト保存: {output_path}")
 
 
 def save_prompt(paper: ExtractedPaper, output_path: Path):
     """Claude用プロンプトをファイルに保存"""
-    text = paper_to_text(paper)
+    with span("paper_to_text"):
+        text = paper_to_text(paper)
     prompt = generate_claude_prompt(text)
-    output_path.write_text(prompt, encoding="utf-8")
+    with span("write.prompt"):
+        write_output(output_path, prompt)
     print(f"✅ Claudeプロンプト保存: {output_path}")
 
 
-def save_template(paper: ExtractedPaper | None, output_path: Path):
-    """要約テンプレートをファイルに保存"""
+_similarity_index = None
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """類似度インデックスを開く（バッチ・監視中は1つを使い回す）"""
+    global _similarity_index
+    if _similarity_index is None:
+        with span("similarity.load"):
+            _similarity_index = SimilarityIndex(SIMILARITY_INDEX_PATH)
+    return _similarity_index
+
+
+def find_related_papers(paper: ExtractedPaper, summary_filename: str) -> list:
+    """既存の要約から関連論文を検索し、この論文を類似度インデックスに追加"""
+    index = get_similarity_index()
+    doc_id = paper.metadata.filename
+    with span("similarity.query"):
+        related = index.query(paper.sections, k=RELATED_PAPERS, exclude=doc_id)
+    with span("similarity.update"):
+        index.add(doc_id, paper.sections, paper.metadata.title, summary_filename)
+        index.save()
+    return [(r.title, r.summary, r.score) for r in related]
+
+
+def save_template(paper: ExtractedPaper | None, output_path: Path, related: list | None = None,
+                  keep_existing: bool = False):
+    """
+    要約テンプレートをファイルに保存
+
+    Args:
+        paper: 抽出した論文データ（None なら空テンプレート）
+        output_path: 保存先
+        related: 関連論文のリスト
+        keep_existing: 既存のファイルが新しいテンプレートと異なる（記入済みの可能性がある）
+            場合は上書きしない
+    """
     info = None
     if paper:
         info = SummaryInfo(
@@ -103,14 +190,20 @@ def save_template(paper: ExtractedPaper | None, output_path: Path):
             year=paper.metadata.year,
             doi=paper.metadata.doi,
             filename=paper.metadata.filename,
+            related=related or [],
         )
     template = generate_summary_template(info)
-    output_path.write_text(template, encoding="utf-8")
+    if keep_existing and output_path.exists() and output_path.read_text(encoding="utf-8") != template:
+        print(f"⏭  既存の要約は上書きしません: {output_path}")
+        print("   （テンプレートを作り直す場合は、このファイルを削除してから再実行してください）")
+        return
+    with span("write.template"):
+        write_output(output_path, template)
     print(f"✅ 要約テンプレート保存: {output_path}")
 
 
-def update_index(paper: ExtractedPaper, summary_filename: str):
-    """要約インデックスを更新"""
+def update_index(paper: ExtractedPaper, summary_filename: str, replaces: str | None = None):
+    """要約インデックスを更新（同じ要約ファイル、または replaces への既存行は置き換える）"""
     index_path = SUMMARIES_DIR / "index.md"
     info = SummaryInfo(
         title=paper.metadata.title,
@@ -121,48 +214,122 @@ def update_index(paper: ExtractedPaper, summary_filename: str):
 
     if index_path.exists():
         content = index_path.read_text(encoding="utf-8")
-        content = content.rstrip() + "\n" + entry + "\n"
+        stale_links = {f"]({summary_filename})"}
+        if replaces:
+            stale_links.add(f"]({replaces})")
+        lines = [
+            line for line in content.rstrip().split("\n")
+            if not any(link in line for link in stale_links)
+        ]
+        content = "\n".join(lines) + "\n" + entry + "\n"
     else:
         content = "# 論文要約インデックス\n\n"
         content += "| 日付 | タイトル | 著者 | 年 |\n"
         content += "|------|---------|------|----|\n"
         content += entry + "\n"
 
-    index_path.write_text(content, encoding="utf-8")
+    with span("write.index"):
+        write_output(index_path, content)
     print(f"✅ インデックス更新: {index_path}")
 
 
+def update_bundle(summary_filename: str | None = None):
+    """要約バンドルを差分更新（ファイル名指定時はその要約だけ）"""
+    names = [summary_filename] if summary_filename else None
+    with span("bundle.update"), SummaryBundle(BUNDLE_PATH, SUMMARIES_DIR) as bundle:
+        stats = bundle.update(names)
+        total = len(bundle)
+    print(f"✅ バンドル更新: {BUNDLE_PATH} "
+          f"(再構築 {stats.rebuilt}件, 削除 {stats.removed}件, 変更なし {stats.unchanged}件, 計 {total}件)")
+
+
 def cmd_process(args):
-    """PDFを処理してすべての出力を生成"""
-    paper = extract_and_show(args.pdf)
+    """PDFを処理してすべての出力を生成（複数指定時は順に処理）"""
+    if args.profile:
+        profiler.enable()
+
+    failed = 0
+    try:
+        for i, pdf_path in enumerate(args.pdf, 1):
+            profiler.start_run(pdf_path)
+            try:
+                with span("process_pdf"):
+                    process_pdf(pdf_path, args.prompt)
+            except Exception as e:
+                # 読めないPDFなどは記録して次へ
+                failed += 1
+                count("failed_pdfs")
+                print(f"❌ [{i}/{len(args.pdf)}] 処理に失敗しました: {pdf_path} ({e})")
+            finally:
+                profiler.end_run()
+    finally:
+        # 途中で中断されても、それまでの計測結果は残す
+        if args.profile:
+            show_profile()
+
+    if failed:
+        print(f"\n⚠️  {len(args.pdf)}件中 {failed}件の処理に失敗しました")
+        sys.exit(1)
+
+
+def show_profile():
+    """計測レポートを保存し、集計表を表示"""
+    SUMMARIES_DIR.mkdir(exist_ok=True)
+    profiler.write_report(PROFILE_REPORT_PATH)
+    print(f"\n{'='*50}")
+    print("ステージ別処理時間")
+    print(f"{'='*50}")
+    print(profiler.format_table())
+    print(f"\n✅ 計測レポート保存: {PROFILE_REPORT_PATH}")
+
+
+def process_pdf(pdf_path: str, make_prompt: bool = False, replaces: str | None = None) -> str:
+    """
+    PDF 1本を処理して抽出テキスト・テンプレート・インデックスを生成する。
+
+    Args:
+        pdf_path: 論文PDFファイルのパス
+        make_prompt: Claude用プロンプトファイルも生成するか
+        replaces: 同じPDFの以前の要約ファイル名。そのファイルが残っていれば
+            引き継ぎ（抽出テキスト・プロンプトだけを作り直す）、なければインデックスの行を置き換える
+
+    Returns:
+        要約テンプレートのファイル名
+    """
+    paper = extract_and_show(pdf_path)
     SUMMARIES_DIR.mkdir(exist_ok=True)
 
     summary_filename = make_summary_filename(paper)
+    if replaces and (SUMMARIES_DIR / replaces).exists():
+        # 再処理: 記入済みかもしれない以前の要約を孤立させないよう、同じファイル名を使う
+        summary_filename = replaces
 
     # 抽出テキスト保存
     extracted_path = SUMMARIES_DIR / summary_filename.replace(".md", "_extracted.txt")
     save_extracted_text(paper, extracted_path)
 
-    if args.prompt:
+    if make_prompt:
         # Claude用プロンプト生成
         prompt_path = SUMMARIES_DIR / summary_filename.replace(".md", "_prompt.txt")
         save_prompt(paper, prompt_path)
 
     # 要約テンプレート保存
     template_path = SUMMARIES_DIR / summary_filename
-    save_template(paper, template_path)
+    related = find_related_papers(paper, summary_filename)
+    save_template(paper, template_path, related, keep_existing=True)
 
     # インデックス更新
-    update_index(paper, summary_filename)
+    update_index(paper, summary_filename, replaces)
+    update_bundle(summary_filename)
 
     print(f"\n{'='*50}")
     print("次のステップ:")
     print(f"{'='*50}")
     print()
     print("1. Claude Projects にPDFをアップロード:")
-    print(f"   {args.pdf}")
+    print(f"   {pdf_path}")
     print()
-    if args.prompt:
+    if make_prompt:
         prompt_path = SUMMARIES_DIR / summary_filename.replace(".md", "_prompt.txt")
         print("2. 以下のプロンプトファイルの内容をClaudeに貼り付け:")
         print(f"   {prompt_path}")
@@ -176,6 +343,151 @@ def cmd_process(args):
     print("💡 iPhoneのClaudeアプリから同じProjectにアクセスして")
     print("   いつでも要約を確認・質問できます")
 
+    return summary_filename
+
+
+def cmd_watch(args):
+    """papers/ を監視し、新規・更新PDFを順に処理"""
+    if args.profile:
+        profiler.enable()
+
+    def process(pdf_path: str, previous: str | None) -> str:
+        profiler.start_run(pdf_path)
+        try:
+            with span("process_pdf"):
+                return process_pdf(pdf_path, args.prompt, replaces=previous)
+        finally:
+            profiler.end_run()
+
+    PAPERS_DIR.mkdir(exist_ok=True)
+    watcher = PaperWatcher(
+        PAPERS_DIR,
+        WATCH_STATE_PATH,
+        process,
+        interval=args.interval,
+        settle=args.settle,
+    )
+    watcher.run()
+
+    if args.profile:
+        show_profile()
+
+
+def cmd_bundle(args):
+    """summaries/ 全体を走査して要約バンドルを差分更新"""
+    SUMMARIES_DIR.mkdir(exist_ok=True)
+    update_bundle()
+
+
+def parse_year_range(value: str) -> int | tuple:
+    """
+    --year の値（例: 2020, 2018-2020）を 年 / (開始年, 終了年) にする。
+
+    argparse の type= に渡すため、不正な値は ArgumentTypeError にする。
+    """
+    try:
+        if "-" in value:
+            start, end = value.split("-", 1)
+            start, end = int(start), int(end)
+        else:
+            return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"年は 2020 または 2018-2022 の形式で指定してください: {value!r}"
+        ) from None
+    if start > end:
+        raise argparse.ArgumentTypeError(f"開始年が終了年より後です: {value!r}")
+    return (start, end)
+
+
+def show_facets(bundle):
+    """絞り込み候補（年ごと・セクションごとの件数）を表示"""
+    facets = bundle.facets()
+    print("📚 絞り込み候補")
+    print("\n  年:")
+    for year, n in facets["year"].items():
+        print(f"    {year}: {n}件")
+    print("\n  セクション:")
+    for name, n in facets["section"].items():
+        print(f"    {name}: {n}件")
+
+
+def cmd_search(args):
+    """要約バンドルを検索して一覧表示"""
+    if not BUNDLE_PATH.exists():
+        print(f"エラー: バンドルがありません。先に --bundle を実行してください: {BUNDLE_PATH}")
+        sys.exit(1)
+    with SummaryBundle(BUNDLE_PATH, SUMMARIES_DIR) as bundle:
+        if not (args.search or args.year or args.author or args.section):
+            # キーワードも絞り込みもなければ候補の一覧を出す
+            show_facets(bundle)
+            return
+        results = bundle.search(args.search, year=args.year, author=args.author or "",
+                                section=args.section or "", limit=args.limit)
+
+    print(f"🔍 {len(results)}件")
+    for r in results:
+        print(f"\n  {r.title or '(タイトル未設定)'} ({r.year or '----'})")
+        if r.authors:
+            print(f"    著者: {r.authors}")
+        if r.one_liner:
+            print(f"    {r.one_liner}")
+        if r.matched_sections:
+            print(f"    一致: {', '.join(r.matched_sections)}")
+        print(f"    {SUMMARIES_DIR / r.entry}")
+
+
+def cmd_scan(args):
+    """PDFの組み込みメタデータと先頭ページだけを読み、トリアージ用CSVを出力"""
+    if args.profile:
+        profiler.enable()
+
+    pdf_paths = args.pdf or [str(PAPERS_DIR / name) for name in sorted(scan_pdfs(PAPERS_DIR))]
+    if not pdf_paths:
+        print(f"エラー: スキャンするPDFがありません: {PAPERS_DIR}")
+        sys.exit(1)
+
+    SUMMARIES_DIR.mkdir(exist_ok=True)
+    failed = 0
+    # Excel で文字化けしないよう BOM 付きで書き出す
+    with open(TRIAGE_CSV_PATH, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TRIAGE_COLUMNS)
+        writer.writeheader()
+        for i, pdf_path in enumerate(pdf_paths, 1):
+            profiler.start_run(pdf_path)
+            try:
+                with span("scan_pdf"):
+                    paper = scan_pdf(pdf_path, max_pages=args.scan_pages)
+            except Exception as e:
+                # 壊れたPDFなどは記録して次へ
+                failed += 1
+                print(f"❌ [{i}/{len(pdf_paths)}] {pdf_path} ({e})")
+                writer.writerow({"file": Path(pdf_path).name, "error": str(e)})
+                continue
+            finally:
+                profiler.end_run()
+
+            meta = paper.metadata
+            writer.writerow({
+                "file": meta.filename,
+                "title": meta.title,
+                "authors": meta.authors,
+                "year": meta.year,
+                "doi": meta.doi,
+                "journal": meta.journal,
+                "pages": meta.pages,
+                "pages_read": paper.pages_read,
+                "abstract": paper.abstract,
+                "error": "",
+            })
+            print(f"📄 [{i}/{len(pdf_paths)}] {meta.filename}: {meta.title or '(タイトル不明)'}")
+
+    print(f"\n✅ トリアージCSV保存: {TRIAGE_CSV_PATH} ({len(pdf_paths) - failed}件, 失敗 {failed}件)")
+    print("💡 詳しく読む論文は PDF を指定して通常どおり処理してください（全文抽出）")
+
+    if args.profile:
+        show_profile()
+
 
 def cmd_template(args):
     """空テンプレートだけ生成"""
@@ -208,19 +520,100 @@ def main():
 
   # プロンプトだけ表示
   python scripts/summarize_paper.py --show-prompt
+
+  # 複数PDFを処理し、ステージ別の処理時間を計測
+  python scripts/summarize_paper.py papers/*.pdf --profile
+
+  # papers/ を監視して新規・更新PDFを自動処理（Ctrl+Cで終了）
+  python scripts/summarize_paper.py --watch --prompt
+
+  # 要約バンドル(summaries/bundle.sqlite)を差分更新
+  python scripts/summarize_paper.py --bundle
+
+  # バンドルを検索（年・著者・セクションで絞り込み）
+  python scripts/summarize_paper.py --search neoantigen --year 2018-2022 --section 手法
+  python scripts/summarize_paper.py --search --author Tanaka
+
+  # papers/ のPDFを簡易スキャンし、summaries/triage.csv にタイトル・DOI・年・要旨を出力
+  python scripts/summarize_paper.py --scan
+  python scripts/summarize_paper.py papers/*.pdf --scan --scan-pages 2
         """,
     )
 
     parser.add_argument(
         "pdf",
-        nargs="?",
-        help="論文PDFファイルのパス",
+        nargs="*",
+        help="論文PDFファイルのパス（複数指定可）",
     )
     parser.add_argument(
         "--prompt",
         action="store_true",
         help="Claude用プロンプトファイルも生成する",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="ステージ別の処理時間を計測し、JSONレポートと集計表を出力する",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="papers/ を監視し、新規・更新されたPDFを自動処理する",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=5.0,
+        help="--watch のスキャン間隔（秒, デフォルト: 5）",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="--watch でファイルの変化が止まってから処理するまでの待ち時間（秒, デフォルト: 2）",
+    )
+    parser.add_argument(
+        "--scan",
+        action="store_true",
+        help="メタデータと先頭ページだけを読み、トリアージ用CSVを出力する（PDF省略時は papers/ 全体）",
+    )
+    parser.add_argument(
+        "--scan-pages",
+        type=int,
+        default=3,
+        help="--scan で読む最大ページ数（デフォルト: 3）",
+    )
+    parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help="summaries/ の要約を検索用バンドルにまとめる（変更された要約だけ再構築）",
+    )
+    parser.add_argument(
+        "--search",
+        nargs="?",
+        const="",
+        metavar="KEYWORD",
+        help="バンドルを検索する（キーワード省略時は絞り込みのみ。絞り込みもなければ候補の件数を表示）",
+    )
+    parser.add_argument(
+        "--year",
+        type=parse_year_range,
+        help="--search の出版年（例: 2020, 2018-2022）",
+    )
+    parser.add_argument(
+        "--author",
+        help="--search の著者名（部分一致）",
+    )
+    parser.add_argument(
+        "--section",
+        help="--search で検索するセクション（例: 手法, 主要な結果）",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="--search の表示件数（デフォルト: 20）",
+    )
     parser.add_argument(
         "--template",
         action="store_true",
@@ -238,11 +631,19 @@ def main():
         cmd_prompt(args)
     elif args.template:
         cmd_template(args)
+    elif args.scan:
+        cmd_scan(args)
+    elif args.watch:
+        cmd_watch(args)
+    elif args.bundle:
+        cmd_bundle(args)
+    elif args.search is not None:
+        cmd_search(args)
     elif args.pdf:
         cmd_process(args)
     else:
         parser.print_help()
-        print("\nエラー: PDFファイルを指定するか、--template / --show-prompt を使用してください")
+        print("\nエラー: PDFファイルを指定するか、--template / --show-prompt / --watch / --scan / --bundle / --search を使用してください")
         sys.exit(1)
 
 
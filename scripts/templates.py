@@ -5,7 +5,7 @@
 Claude Projects に貼り付けて論文要約を依頼する際のプロンプトも提供する。
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
 
 
@@ -18,6 +18,7 @@ class SummaryInfo:
     year: str = ""
     doi: str = ""
     filename: str = ""
+    related: list = field(default_factory=list)  # [(タイトル, 要約ファイル名, 類似度), ...]
 
 
 def generate_summary_template(info: SummaryInfo | None = None) -> str:
@@ -36,6 +37,7 @@ def generate_summary_template(info: SummaryInfo | None = None) -> str:
     journal = info.journal if info else ""
     year = info.year if info else ""
     doi = info.doi if info else ""
+    related = _format_related(info.related if info else [])
 
     template = f"""# {title or "[論文タイトル]"}
 
@@ -92,6 +94,10 @@ def generate_summary_template(info: SummaryInfo | None = None) -> str:
 - [著者が認めている限界]
 - [今後の研究方向]
 
+## 関連論文
+
+{related}
+
 ## 自分メモ
 
 - **自研究との関連**: [自分の研究にどう関係するか]
@@ -105,6 +111,18 @@ def generate_summary_template(info: SummaryInfo | None = None) -> str:
     return template
 
 
+def _format_related(related: list) -> str:
+    """関連論文リストをMarkdownの箇条書きにする"""
+    if not related:
+        return "- [関連する既存の要約]"
+    lines = []
+    for title, summary_filename, score in related:
+        title = title or "[タイトル未設定]"
+        link = f"[{title}]({summary_filename})" if summary_filename else title
+        lines.append(f"- {link} (類似度 {score:.2f})")
+    return "\n".join(lines)
+
+
 def generate_claude_prompt(extracted_text: str = "") -> str:
     """
     Claude に論文要約を依頼するためのプロンプトを生成する。
@@ -0,0 +1,241 @@
+"""
+papers/ フォルダ監視モジュール
+
+papers/ に追加・更新されたPDFを定期的な stat スキャンで検出し、
+順に処理する。状態ファイルに処理済みPDFの (サイズ, 更新時刻) を保存するため、
+再起動しても処理済みのPDFは再処理しない。
+
+- 検出: os.scandir による stat のみ。更新時刻だけが変わったファイルは
+  ハッシュを比べ、中身が同じなら（touch されただけなら）再処理しない
+- デバウンス: サイズと更新時刻が settle 秒以上変化しなくなるまで待つ
+  （コピー途中のファイルを処理しないため）
+- 処理: 上限付きキューとワーカースレッド1本で順に処理
+"""
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class FileSignature:
+    """ファイル変更検出用の stat 情報"""
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class _Pending:
+    """デバウンス待ちのファイル"""
+    signature: FileSignature
+    stable_since: float
+
+
+def scan_pdfs(papers_dir: Path) -> dict:
+    """papers_dir 直下のPDFを stat だけで列挙する"""
+    found = {}
+    try:
+        entries = os.scandir(papers_dir)
+    except FileNotFoundError:
+        return found
+    with entries:
+        for entry in entries:
+            if not entry.name.lower().endswith(".pdf"):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                # スキャン中に削除・移動された
+                continue
+            found[entry.name] = FileSignature(st.st_size, st.st_mtime_ns)
+    return found
+
+
+def file_sha1(path: Path) -> str:
+    """ファイル内容の SHA-1（touch だけの更新を見分けるため）"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PaperWatcher:
+    """
+    papers/ を監視して新規・更新PDFを処理する。
+
+    Args:
+        papers_dir: 監視するディレクトリ
+        state_path: 処理済み状態を保存するJSONファイル
+        process: PDFパスを受け取り、生成した要約ファイル名を返す関数。
+            第2引数には同じPDFの前回の要約ファイル名（なければ None）が渡される。
+        interval: スキャン間隔（秒）
+        settle: 変化が止まってから処理を開始するまでの待ち時間（秒）
+        max_queue: 処理待ちキューの上限
+    """
+
+    def __init__(self, papers_dir: Path, state_path: Path, process,
+                 interval: float = 5.0, settle: float = 2.0, max_queue: int = 16):
+        self.papers_dir = papers_dir
+        self.state_path = state_path
+        self.process = process
+        self.interval = interval
+        self.settle = settle
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.state = self._load_state()
+        self._pending = {}
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _load_state(self) -> dict:
+        if not self.state_path.exists():
+            return {}
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            print(f"⚠️  状態ファイルを読み込めません。新規に作成します: {self.state_path}")
+            return {}
+
+    def _save_state(self):
+        """状態ファイルを書き出す（一時ファイル経由で置き換え）"""
+        self.state_path.parent.mkdir(exist_ok=True)
+        tmp_path = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        tmp_path.write_text(
+            json.dumps(self.state, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        os.replace(tmp_path, self.state_path)
+
+    def _is_processed(self, name: str, sig: FileSignature) -> bool:
+        with self._lock:
+            record = self.state.get(name)
+        if record is None or record.get("size") != sig.size:
+            return False
+        if record.get("mtime_ns") == sig.mtime_ns:
+            return True
+        # 更新時刻だけ変わった: 中身が同じなら記録を更新して処理済みとみなす
+        if not record.get("sha1"):
+            return False
+        try:
+            digest = file_sha1(self.papers_dir / name)
+        except OSError:
+            return False
+        if digest != record["sha1"]:
+            return False
+        with self._lock:
+            record["mtime_ns"] = sig.mtime_ns
+            self._save_state()
+        return True
+
+    def scan_once(self, now: float | None = None):
+        """1回スキャンし、変化が止まった新規・更新PDFをキューに入れる"""
+        now = time.monotonic() if now is None else now
+        found = scan_pdfs(self.papers_dir)
+
+        # 消えたファイルはデバウンス対象から外す
+        for name in list(self._pending):
+            if name not in found:
+                del self._pending[name]
+
+        for name, sig in found.items():
+            with self._lock:
+                queued = name in self._queued
+            if queued or self._is_processed(name, sig):
+                self._pending.pop(name, None)
+                continue
+
+            pending = self._pending.get(name)
+            if pending is None or pending.signature != sig:
+                # 初検出、またはコピー途中でまだ変化している
+                self._pending[name] = _Pending(sig, now)
+                continue
+            if now - pending.stable_since < self.settle:
+                continue
+
+            try:
+                self.queue.put_nowait((name, sig))
+            except queue.Full:
+                # 次回スキャンで再試行
+                continue
+            with self._lock:
+                self._queued.add(name)
+            del self._pending[name]
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            name, sig = item
+            self._handle(name, sig)
+            self.queue.task_done()
+
+    def _handle(self, name: str, sig: FileSignature):
+        pdf_path = self.papers_dir / name
+        previous = self.state.get(name, {}).get("summary")
+        record = {"size": sig.size, "mtime_ns": sig.mtime_ns}
+        try:
+            record["sha1"] = file_sha1(pdf_path)
+            record["summary"] = self.process(str(pdf_path), previous)
+        except Exception as e:
+            # 失敗したPDFも記録し、ファイルが更新されるまで再試行しない
+            print(f"❌ 処理に失敗しました: {pdf_path} ({e})")
+            record["summary"] = previous
+            record["error"] = str(e)
+        with self._lock:
+            self.state[name] = record
+            self._queued.discard(name)
+            self._save_state()
+
+    def run(self):
+        """Ctrl+C で止めるまで監視を続ける"""
+        worker = threading.Thread(target=self._worker, daemon=True)
+        worker.start()
+        print(f"👀 監視を開始: {self.papers_dir} ({self.interval:g}秒間隔, Ctrl+Cで終了)")
+        try:
+            while not self._stop.is_set():
+                self.scan_once()
+                self._stop.wait(self.interval)
+        except KeyboardInterrupt:
+            print("\n⏹  監視を終了します（処理中のPDFが終わるまで待機。もう一度 Ctrl+C で強制終了）")
+        finally:
+            skipped = self._drain_queue()
+            if skipped:
+                print(f"   処理待ちの {skipped} 件は次回の起動時に処理します")
+            self.queue.put(None)
+            try:
+                worker.join()
+            except KeyboardInterrupt:
+                print("\n⚠️  強制終了しました（処理中だったPDFは次回の起動時に再処理します）")
+
+    def _drain_queue(self) -> int:
+        """
+        処理待ちのPDFをキューから外す。
+
+        状態ファイルには記録しないので、次回の起動時に再検出されて処理される。
+
+        Returns:
+            外した件数
+        """
+        skipped = 0
+        while True:
+            try:
+                name, _ = self.queue.get_nowait()
+            except queue.Empty:
+                return skipped
+            self.queue.task_done()
+            with self._lock:
+                self._queued.discard(name)
+            skipped += 1
+
+    def stop(self):
+        """監視ループを停止する"""
+        self._stop.set()
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from bundle import METADATA_SECTION, SummaryBundle, parse_summary
+from templates import SummaryInfo, generate_summary_template
+
+
+def _write_summaries(summaries_dir):
+    melanoma = SummaryInfo(title="Neoantigen vaccines in melanoma", journal="Nature", year="2021")
+    other = SummaryInfo(
+        title="HLA ligandome of lung cancer", journal="Cell", year="2019",
+        related=[(melanoma.title, "2024-01-01_melanoma.md", 0.42)],
+    )
+    (summaries_dir / "2024-01-01_melanoma.md").write_text(
+        generate_summary_template(melanoma), encoding="utf-8")
+    (summaries_dir / "2024-01-02_lung.md").write_text(
+        generate_summary_template(other), encoding="utf-8")
+
+
+def test_related_papers_section_is_not_indexed():
+    _, sections = parse_summary(generate_summary_template(SummaryInfo(
+        title="X", related=[("Neoantigen vaccines in melanoma", "a.md", 0.5)],
+    )))
+    assert "関連論文" not in [name for name, _ in sections]
+
+
+def test_search_matches_title_not_related_list(tmp_path):
+    _write_summaries(tmp_path)
+    with SummaryBundle(tmp_path / "bundle.sqlite", tmp_path) as bundle:
+        bundle.update()
+        results = bundle.search("melanoma")
+        assert [r.entry for r in results] == ["2024-01-01_melanoma.md"]
+        assert results[0].matched_sections == [METADATA_SECTION]
+        assert [r.entry for r in bundle.search("Cell", section=METADATA_SECTION)] == [
+            "2024-01-02_lung.md"]
+        assert bundle.facets()["section"] == {}
+        assert bundle.facets()["year"] == {2021: 1, 2019: 1}
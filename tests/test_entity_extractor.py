@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from entity_extractor import extract_entities, find_journal
+
+
+PAPER_WITH_HEADINGS = """\
+Neoantigen presentation in melanoma
+
+ABSTRACT
+We identified HLA ligands by mass spectrometry.
+
+MATERIALS AND METHODS
+PEPTIDES
+Synthetic peptides were purchased from a commercial vendor.
+
+STATISTICAL ANALYSIS
+Groups were compared with the Mann-Whitney test.
+
+RESULTS
+The OVA epitope SIINFEKL and the influenza peptide GILGFVFTL
+(HLA-A*02:01) elicited strong responses.
+
+REFERENCES
+1. Smith J et al. Nature 2020.
+"""
+
+
+def test_uppercase_headings_are_not_peptides():
+    entities = extract_entities(PAPER_WITH_HEADINGS)
+    assert entities.peptides == ["SIINFEKL", "GILGFVFTL"]
+
+
+def test_peptide_requires_sequence_context():
+    text = "Cells were washed in PBS.\n\nCONCLUSIONS DRAWN HERE\n\nDATASETS\nall raw files were deposited."
+    assert extract_entities(text).peptides == []
+
+
+def test_peptide_table_column():
+    text = "Table 2\nSIINFEKL 8.2\nNLVPMVATV 7.9\nYLQPRTFLL 6.5\n"
+    assert extract_entities(text).peptides == ["SIINFEKL", "NLVPMVATV", "YLQPRTFLL"]
+
+
+def test_common_words_are_not_journals():
+    text = "Blood samples were collected. Cell lines were cultured.\nScience has shown that ..."
+    entities = extract_entities(text)
+    assert entities.journal == ""
+    assert entities.journals == []
+
+
+def test_journal_in_header_context():
+    text = "Nature Immunology | Volume 22 | March 2021 | 301-312\nBlood samples were collected."
+    assert extract_entities(text).journal == "Nature Immunology"
+    assert extract_entities("Cancer Cell\nArticle\nBlood cells").journal == "Cancer Cell"
+    assert extract_entities("Blood. 2019;134(2):1-10. doi:10.1182/blood.1").journal == "Blood"
+
+
+def test_find_journal_in_metadata():
+    assert find_journal("Nature Communications, doi:10.1038/s41467-020-1") == "Nature Communications"
+    assert find_journal("") == ""
+
+
+def test_ambiguous_gene_symbols_need_gene_context():
+    assert extract_entities("APC function mattered for T-cell priming.").genes == []
+    assert extract_entities("Patients meeting MET criteria were enrolled.").genes == []
+    text = "Tumors carried KRAS and APC mutations; MET amplification was rare."
+    assert extract_entities(text).genes == ["KRAS", "APC", "MET"]
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("fitz")
+
+from pdf_extractor import _find_abstract
+
+
+STRUCTURED_ABSTRACT = """\
+Neoantigen vaccines in melanoma
+
+Abstract
+Background: Neoantigens are attractive vaccine targets.
+Methods: We vaccinated 20 patients with long peptides.
+Results: Most patients developed T-cell responses.
+Conclusions: The vaccine was safe and immunogenic.
+
+Keywords: neoantigen, melanoma
+
+1. Introduction
+Melanoma has a high mutational burden.
+"""
+
+
+def test_structured_abstract_is_not_cut_at_subheadings():
+    abstract, complete = _find_abstract(STRUCTURED_ABSTRACT)
+    assert complete
+    assert abstract.startswith("Background: Neoantigens")
+    assert "Conclusions: The vaccine was safe" in abstract
+    assert "Melanoma has a high" not in abstract
+
+
+def test_abstract_line_starting_with_main_is_kept():
+    text = "Abstract\nMain findings are summarized here.\n\nIntroduction\nBody text.\n"
+    abstract, complete = _find_abstract(text)
+    assert complete
+    assert abstract == "Main findings are summarized here."
+
+
+def test_end_heading_right_after_abstract_heading_is_skipped():
+    text = "Summary\nBackground\nT cells recognise peptides.\n\nBackground\nMore text.\n"
+    abstract, complete = _find_abstract(text)
+    assert complete
+    assert abstract == "Background T cells recognise peptides."
@@ -0,0 +1,60 @@
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from proteome_index import ProteomeIndex, build_suffix_array, read_fasta
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+
+def _build(tmp_path, proteins):
+    fasta = tmp_path / "proteome.fasta"
+    fasta.write_text("".join(f">{pid}\n{seq}\n" for pid, seq in proteins))
+    return ProteomeIndex.build(str(fasta), str(tmp_path / "index")), list(read_fasta(str(fasta)))
+
+
+def _brute_force(proteins, peptide, max_mismatches):
+    """総当たり: 各タンパク質の全位置でミスマッチ数を数える"""
+    hits = []
+    for pid, seq in proteins:
+        for i in range(len(seq) - len(peptide) + 1):
+            if sum(a != b for a, b in zip(seq[i:i + len(peptide)], peptide)) <= max_mismatches:
+                hits.append(pid)
+                break
+    return hits
+
+
+def test_suffix_array_is_sorted_for_short_text():
+    # 残基コードの最大値 (26) より短いテキストでも辞書順になる
+    text = np.array([23, 1, 25, 2, 0, 25, 26, 1, 11, 0], dtype=np.uint8)
+    sa = build_suffix_array(text)
+    suffixes = [tuple(text[i:]) for i in sa]
+    assert suffixes == sorted(suffixes)
+
+
+def test_tiny_fasta(tmp_path):
+    index, _ = _build(tmp_path, [("P1", "WAYB"), ("P2", "YZAK")])
+    assert index.find(["A", "AY", "YZ"]) == [["P1", "P2"], ["P1"], ["P2"]]
+
+
+@pytest.mark.parametrize("max_mismatches", [0, 1, 2])
+def test_matches_brute_force(tmp_path, max_mismatches):
+    rng = random.Random(max_mismatches)
+    proteins = [
+        (f"P{i}", "".join(rng.choices(AMINO_ACIDS[:6], k=rng.randint(1, 40))))
+        for i in range(50)
+    ]
+    index, proteins = _build(tmp_path, proteins)
+    peptides = ["".join(rng.choices(AMINO_ACIDS[:6], k=rng.randint(1, 8))) for _ in range(200)]
+
+    found = index.find(peptides, max_mismatches)
+    is_self = index.is_self(peptides, max_mismatches)
+    for peptide, hits, hit in zip(peptides, found, is_self):
+        expected = _brute_force(proteins, peptide, max_mismatches)
+        assert sorted(hits) == sorted(expected), peptide
+        assert hit == bool(expected), peptide